@@ -0,0 +1,71 @@
+import functools
+from typing import NamedTuple, Sequence
+
+from .dates import parse_date_range
+
+DEFAULT_NIGHTS = 5  # Assumed stay when the travel dates cannot be parsed
+FLIGHT_LEGS = 2  # Flight offers are priced one way, per person
+
+class CostBreakdown(NamedTuple):
+    """Whole-trip cost of a set of offers, split by kind."""
+    flights: float
+    hotel: float
+    activities: float
+    nights: int
+    travelers: int
+
+    @property
+    def total(self) -> float:
+        return self.flights + self.hotel + self.activities
+
+    @property
+    def per_person(self) -> float:
+        return self.total / self.travelers
+
+    @property
+    def per_night(self) -> float:
+        return self.total / self.nights
+
+class TripCosts(NamedTuple):
+    """How offer prices scale to whole-trip costs for one request.
+
+    Flights are priced per person and leg, hotels per night (already adjusted
+    for the party size) and activities per person.
+    """
+    nights: int
+    travelers: int
+    dated: bool  # False when the dates could not be parsed and DEFAULT_NIGHTS is assumed
+
+    def units(self, kind: str) -> int:
+        """How many times one offer's price is paid over the trip."""
+        if kind == "flights":
+            return FLIGHT_LEGS * self.travelers
+        if kind == "hotels":
+            return self.nights
+        if kind == "activities":
+            return self.travelers
+        raise ValueError(f"Unknown offer kind: {kind}")
+
+    def total(self, kind: str, price: float) -> float:
+        return price * self.units(kind)
+
+    def breakdown(self, flight=None, hotel=None, activities: Sequence = ()) -> CostBreakdown:
+        """Cost the trip for one flight, one hotel and a set of activities (each optional)."""
+        return CostBreakdown(
+            flights=self.total("flights", flight.price) if flight else 0.0,
+            hotel=self.total("hotels", hotel.price) if hotel else 0.0,
+            activities=self.total("activities", sum(activity.price for activity in activities)),
+            nights=self.nights,
+            travelers=self.travelers,
+        )
+
+# Costing for requests without travel details: one traveler, the default stay
+DEFAULT_COSTS = TripCosts(nights=DEFAULT_NIGHTS, travelers=1, dated=False)
+
+@functools.lru_cache(maxsize=4096)
+def trip_costs(request) -> TripCosts:
+    """Return the cost model for a TravelRequest, computed once per request."""
+    date_range = parse_date_range(request.dates)
+    if date_range is None:
+        return TripCosts(nights=DEFAULT_NIGHTS, travelers=request.travelers, dated=False)
+    return TripCosts(nights=date_range.nights, travelers=request.travelers, dated=True)
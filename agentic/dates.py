@@ -0,0 +1,111 @@
+import datetime
+import functools
+import re
+from typing import List, NamedTuple, Optional
+
+MAX_TRIP_DAYS = 366
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ], start=1)
+    for name in names
+}
+
+_ISO_DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_SEPARATOR = re.compile(r"\s*(?:-|–|—|\bto\b|\buntil\b|\bthrough\b|\btill\b)\s*")
+_TOKEN = re.compile(r"[a-z]+|\d+")
+
+class DateRange(NamedTuple):
+    """An inclusive range of travel days."""
+    start: datetime.date
+    end: datetime.date
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    @property
+    def nights(self) -> int:
+        """Nights away; a same-day trip counts as one night."""
+        return max(self.days - 1, 1)
+
+    def dates(self) -> List[datetime.date]:
+        return [self.start + datetime.timedelta(days=i) for i in range(self.days)]
+
+def _parse_side(text: str):
+    """Extract (month, day, year) from one side of a range; missing parts are None."""
+    month = day = year = None
+    for token in _TOKEN.findall(text):
+        if token.isdigit():
+            value = int(token)
+            if len(token) == 4:
+                year = value
+            elif day is None and 1 <= value <= 31:
+                day = value
+        elif month is None:
+            month = _MONTHS.get(token) or _MONTHS.get(token[:3]) if len(token) >= 3 else None
+    return month, day, year
+
+def _next_occurrence(month: int, day: int, today: datetime.date) -> int:
+    """Year of the next time month/day comes round, counting today."""
+    try:
+        return today.year if datetime.date(today.year, month, day) >= today else today.year + 1
+    except ValueError:
+        return today.year
+
+@functools.lru_cache(maxsize=1024)
+def _parse(dates: str, today: datetime.date) -> Optional[DateRange]:
+    text = dates.strip().lower()
+
+    iso = _ISO_DATE.findall(text)
+    if iso:
+        try:
+            start, end = (datetime.date(*map(int, parts)) for parts in (iso[0], iso[-1]))
+        except ValueError:
+            return None
+    else:
+        sides = [side for side in _SEPARATOR.split(text, maxsplit=1) if side.strip()]
+        if not sides:
+            return None
+        (m1, d1, y1) = _parse_side(sides[0])
+        (m2, d2, y2) = _parse_side(sides[-1]) if len(sides) > 1 else (m1, d1, y1)
+
+        # "May 5-9" shares the month; "5-9 May" puts it on the right
+        m1 = m1 or m2
+        m2 = m2 or m1
+        if not (m1 and d1 and d2):
+            return None
+
+        # The year is usually written once, at the end; a range like
+        # "Dec 28 - Jan 3" crosses into the next year
+        rollover = 1 if m1 > m2 else 0
+        if y1 is None and y2 is None:
+            y1 = _next_occurrence(m1, d1, today)
+        if y1 is None:
+            y1 = y2 - rollover
+        if y2 is None:
+            y2 = y1 + rollover
+
+        try:
+            start = datetime.date(y1, m1, d1)
+            end = datetime.date(y2, m2, d2)
+        except ValueError:
+            return None
+
+    if end < start or (end - start).days >= MAX_TRIP_DAYS:
+        return None
+    return DateRange(start, end)
+
+def parse_date_range(dates: str, today: Optional[datetime.date] = None) -> Optional[DateRange]:
+    """Parse a travel dates string into a DateRange, or None if it cannot be understood.
+
+    Accepts the common forms people type, e.g. "May 5-9, 2025", "5-9 May 2025",
+    "May 28 - June 2, 2025", "Dec 28, 2025 to Jan 3, 2026", "2025-05-05 to 2025-05-09"
+    and single days. A missing year means the next occurrence of the start date.
+    Results are cached.
+    """
+    return _parse(str(dates), today or datetime.date.today())
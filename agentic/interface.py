@@ -1,29 +1,225 @@
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, NamedTuple, Optional, Tuple
+import json
+import math
+import re
 
+from .costing import DEFAULT_COSTS, CostBreakdown, TripCosts, trip_costs
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for msgpack serialization
+    msgpack = None
+
+def _msgpack():
+    if msgpack is None:
+        raise ImportError("msgpack serialization requires the 'msgpack' package")
+    return msgpack
+
+class Flight(NamedTuple):
+    """An immutable flight offer. Priced views are copies made with ``_replace``."""
+    airline: str
+    departure: str
+    arrival: str
+    price: float
+    travel_class: Optional[str] = None
+
+class Hotel(NamedTuple):
+    """An immutable hotel offer; ``price`` is per night."""
+    name: str
+    rating: float
+    price: float
+    type: str
+
+class Activity(NamedTuple):
+    """An immutable activity offer. ``tour_type`` is set on priced views (e.g. Private, Group)."""
+    name: str
+    duration: str
+    price: float
+    category: str
+    tour_type: Optional[str] = None
+
+class Itinerary(NamedTuple):
+    """One flight, one hotel and a set of activities chosen together to fit the budget."""
+    flight: Optional[Flight]
+    hotel: Optional[Hotel]
+    activities: Tuple[Activity, ...]
+    nights: int
+    travelers: int
+    cost: float  # Round-trip flights for everyone, hotel for all nights and every activity
+    score: float
+
+    @property
+    def breakdown(self) -> CostBreakdown:
+        return TripCosts(self.nights, self.travelers, dated=True).breakdown(self.flight, self.hotel, self.activities)
+
+    def to_dict(self) -> Dict:
+        return {
+            "flight": self.flight._asdict() if self.flight else None,
+            "hotel": self.hotel._asdict() if self.hotel else None,
+            "activities": [activity._asdict() for activity in self.activities],
+            "nights": self.nights,
+            "travelers": self.travelers,
+            "cost": self.cost,
+            "score": self.score,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Itinerary":
+        return cls(
+            flight=Flight(**data["flight"]) if data.get("flight") else None,
+            hotel=Hotel(**data["hotel"]) if data.get("hotel") else None,
+            activities=tuple(Activity(**activity) for activity in data.get("activities", [])),
+            nights=data["nights"],
+            travelers=data.get("travelers", 1),
+            cost=data["cost"],
+            score=data["score"],
+        )
+
+def normalize_destination(destination: str) -> str:
+    """Case-fold a destination and collapse its whitespace."""
+    return " ".join(str(destination).casefold().split())
+
+def normalize_dates(dates: str) -> str:
+    """Lower-case a dates string and normalize the spacing around dashes and commas."""
+    normalized = re.sub(r"\s*[-\u2013\u2014]\s*", "-", " ".join(str(dates).lower().split()))
+    return re.sub(r"\s*,\s*", ", ", normalized)
+
+@dataclass(frozen=True, slots=True)
 class TravelRequest:
-    def __init__(self, destination: str, dates: str, budget: float,
-                 travel_style: str = "Balanced",
-                 accommodation_type: str = "Hotel",
-                 travelers: int = 2,
-                 interests: Optional[List[str]] = None):
-        self.destination = destination
-        self.dates = dates
-        self.budget = budget
-        self.travel_style = travel_style
-        self.accommodation_type = accommodation_type
-        self.travelers = travelers
-        self.interests = interests or []
+    """A validated, immutable and hashable travel request; equality and hashing use the exact field values."""
+    destination: str
+    dates: str
+    budget: float
+    travel_style: str = "Balanced"
+    accommodation_type: str = "Hotel"
+    travelers: int = 2
+    interests: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        destination = " ".join(str(self.destination).split())
+        if not destination:
+            raise ValueError("destination must not be empty")
+        dates = " ".join(str(self.dates).split())
+        if not dates:
+            raise ValueError("dates must not be empty")
+        # Numbers may come as strings (forms, query strings); whole-dollar budgets stay ints,
+        # so they display without ".0"
+        budget = float(self.budget)
+        if not math.isfinite(budget) or budget <= 0:
+            raise ValueError(f"budget must be a positive amount, got {self.budget!r}")
+        budget = int(budget) if budget.is_integer() else budget
+        travelers = float(self.travelers)
+        if not travelers.is_integer() or travelers < 1:
+            raise ValueError(f"travelers must be a positive whole number, got {self.travelers!r}")
+        travelers = int(travelers)
+        interests = (self.interests,) if isinstance(self.interests, str) else tuple(self.interests or ())
+        for interest in interests:
+            if not isinstance(interest, str):
+                raise TypeError(f"interests must be strings, got {interest!r}")
+        interests = tuple(dict.fromkeys(interest.strip() for interest in interests if interest.strip()))
+
+        object.__setattr__(self, "destination", destination)
+        object.__setattr__(self, "dates", dates)
+        object.__setattr__(self, "budget", budget)
+        object.__setattr__(self, "travel_style", str(self.travel_style).strip())
+        object.__setattr__(self, "accommodation_type", str(self.accommodation_type).strip())
+        object.__setattr__(self, "travelers", travelers)
+        object.__setattr__(self, "interests", interests)
 
+    def to_dict(self) -> Dict:
+        return {
+            "destination": self.destination,
+            "dates": self.dates,
+            "budget": self.budget,
+            "travel_style": self.travel_style,
+            "accommodation_type": self.accommodation_type,
+            "travelers": self.travelers,
+            "interests": list(self.interests),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TravelRequest":
+        fields = ("destination", "dates", "budget", "travel_style", "accommodation_type", "travelers", "interests")
+        return cls(**{name: data[name] for name in fields if name in data})
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data) -> "TravelRequest":
+        return cls.from_dict(json.loads(data))
+
+    def to_msgpack(self) -> bytes:
+        return _msgpack().packb(self.to_dict())
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> "TravelRequest":
+        return cls.from_dict(_msgpack().unpackb(data))
+
+@dataclass(frozen=True, slots=True)
 class TravelRecommendation:
-    def __init__(self, flights: List[Dict], hotels: List[Dict], activities: List[Dict], travel_plan: str = ""):
-        self.flights = flights
-        self.hotels = hotels
-        self.activities = activities
-        self.travel_plan = travel_plan
+    """The offers and travel plan produced for a request."""
+    flights: Tuple[Flight, ...]
+    hotels: Tuple[Hotel, ...]
+    activities: Tuple[Activity, ...]
+    travel_plan: str = ""
+    errors: Dict[str, str] = field(default_factory=dict, compare=False)  # Sources that failed or timed out, with the reason
+    request: Optional[TravelRequest] = None
+    itinerary: Optional[Itinerary] = None  # Best combination of the offers within the budget, if any fits
+
+    def __post_init__(self):
+        object.__setattr__(self, "flights", tuple(self.flights))
+        object.__setattr__(self, "hotels", tuple(self.hotels))
+        object.__setattr__(self, "activities", tuple(self.activities))
+        object.__setattr__(self, "errors", dict(self.errors or {}))
+
+    def __hash__(self):
+        return hash((self.flights, self.hotels, self.activities, self.travel_plan, self.request, self.itinerary))
 
     def get_total_cost(self) -> float:
         """Calculate the estimated total cost of the trip."""
-        flight_cost = sum(flight["price"] for flight in self.flights[:1]) * 2  # Round trip for first option
-        hotel_cost = sum(hotel["price"] for hotel in self.hotels[:1]) * 5  # 5 nights at first hotel
-        activity_cost = sum(activity["price"] for activity in self.activities[:3])  # Top 3 activities
-        return flight_cost + hotel_cost + activity_cost
+        if self.itinerary is not None:
+            return self.itinerary.cost
+        # Best-ranked flight and hotel with the three best-ranked activities, for the trip's length and party
+        costs = trip_costs(self.request) if self.request is not None else DEFAULT_COSTS
+        return costs.breakdown(self.flights[0] if self.flights else None,
+                               self.hotels[0] if self.hotels else None,
+                               self.activities[:3]).total
+
+    def to_dict(self) -> Dict:
+        return {
+            "flights": [flight._asdict() for flight in self.flights],
+            "hotels": [hotel._asdict() for hotel in self.hotels],
+            "activities": [activity._asdict() for activity in self.activities],
+            "travel_plan": self.travel_plan,
+            "errors": dict(self.errors),
+            "request": self.request.to_dict() if self.request else None,
+            "itinerary": self.itinerary.to_dict() if self.itinerary else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TravelRecommendation":
+        return cls(
+            flights=[Flight(**flight) for flight in data.get("flights", [])],
+            hotels=[Hotel(**hotel) for hotel in data.get("hotels", [])],
+            activities=[Activity(**activity) for activity in data.get("activities", [])],
+            travel_plan=data.get("travel_plan", ""),
+            errors=data.get("errors") or {},
+            request=TravelRequest.from_dict(data["request"]) if data.get("request") else None,
+            itinerary=Itinerary.from_dict(data["itinerary"]) if data.get("itinerary") else None,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data) -> "TravelRecommendation":
+        return cls.from_dict(json.loads(data))
+
+    def to_msgpack(self) -> bytes:
+        return _msgpack().packb(self.to_dict())
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> "TravelRecommendation":
+        return cls.from_dict(_msgpack().unpackb(data))
@@ -0,0 +1,148 @@
+import csv
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Type
+
+import numpy as np
+
+from .interface import Activity, Flight, Hotel
+
+# Directory holding flights.csv, hotels.csv and activities.csv
+INVENTORY_DIR = os.getenv(
+    "INVENTORY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "inventory"),
+)
+
+# Numeric columns of each table; every other column is kept as text
+NUMERIC_COLUMNS = {"price", "rating"}
+
+# Record type and text columns with a hash index, per table (destination is always indexed)
+TABLES = {
+    "flights": (Flight, ()),
+    "hotels": (Hotel, ("type",)),
+    "activities": (Activity, ("category",)),
+}
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+def _key(value) -> str:
+    """Normalize an indexed value so lookups are case and whitespace insensitive."""
+    return " ".join(str(value).casefold().split())
+
+class OfferTable:
+    """Column-oriented offer table with hash indexes and a per-destination price index.
+
+    Each column is a NumPy array; a row is identified by its position. Lookups
+    return sorted arrays of row ids, which can be combined with ``np.intersect1d``
+    and turned into records with ``records()``. Records are immutable and built
+    once, so they can be shared between requests and threads.
+    """
+
+    def __init__(self, record_type: Type[NamedTuple], columns: Dict[str, np.ndarray], indexed: Sequence[str] = ()):
+        self.record_type = record_type
+        self.columns = columns
+        self.size = len(columns["destination"])
+
+        fields = [name for name in record_type._fields if name in columns]
+        values = [columns[name].tolist() for name in fields]
+        self._records = tuple(record_type(**dict(zip(fields, row))) for row in zip(*values))
+
+        self._indexes = {name: self._build_hash_index(columns[name]) for name in ("destination", *indexed)}
+
+        # Per destination, row ids ordered by price for range lookups
+        prices = columns["price"]
+        self._price_index = {}
+        for destination, rows in self._indexes["destination"].items():
+            order = rows[np.argsort(prices[rows], kind="stable")]
+            self._price_index[destination] = (order, prices[order])
+
+    @staticmethod
+    def _build_hash_index(values: np.ndarray) -> Dict[str, np.ndarray]:
+        # Group rows by raw value, then merge values that normalize to the same key
+        unique, inverse = np.unique(values, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+        index = {}
+        for i, value in enumerate(unique):
+            key = _key(value)
+            rows = order[bounds[i]:bounds[i + 1]]
+            index[key] = np.sort(np.concatenate([index[key], rows])) if key in index else rows
+        return index
+
+    @classmethod
+    def from_csv(cls, record_type: Type[NamedTuple], path: str, indexed: Sequence[str] = ()) -> "OfferTable":
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            raw = list(zip(*reader)) or [()] * len(header)
+
+        columns = {}
+        for name, values in zip(header, raw):
+            if name in NUMERIC_COLUMNS:
+                columns[name] = np.array(values, dtype=np.float64)
+            else:
+                columns[name] = np.array(values, dtype=object)
+        return cls(record_type, columns, indexed)
+
+    def lookup(self, column: str, values: Iterable[str]) -> np.ndarray:
+        """Return the sorted row ids whose indexed ``column`` matches any of ``values``."""
+        index = self._indexes[column]
+        parts = [index[k] for k in {_key(value) for value in values} if k in index]
+        if not parts:
+            return _EMPTY
+        return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+    def query(self, destination: str, max_price: Optional[float] = None,
+              within: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the sorted row ids for ``destination`` priced at or below ``max_price``.
+
+        ``within`` optionally restricts the result to rows from a previous lookup.
+        """
+        entry = self._price_index.get(_key(destination))
+        if entry is None:
+            return _EMPTY
+        order, prices = entry
+        if max_price is not None:
+            order = order[:np.searchsorted(prices, max_price, side="right")]
+        rows = np.sort(order)
+        if within is not None:
+            rows = np.intersect1d(rows, within, assume_unique=True)
+        return rows
+
+    def records(self, rows: np.ndarray) -> List[NamedTuple]:
+        """Return the shared records for rows, in the order given."""
+        records = self._records
+        return [records[row] for row in rows.tolist()]
+
+class Inventory:
+    """Flight, hotel and activity tables loaded from an inventory directory."""
+
+    def __init__(self, flights: OfferTable, hotels: OfferTable, activities: OfferTable):
+        self.flights = flights
+        self.hotels = hotels
+        self.activities = activities
+
+    @classmethod
+    def load(cls, directory: str = INVENTORY_DIR) -> "Inventory":
+        tables = {
+            name: OfferTable.from_csv(record_type, os.path.join(directory, f"{name}.csv"), indexed)
+            for name, (record_type, indexed) in TABLES.items()
+        }
+        return cls(**tables)
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+def get_inventory() -> Inventory:
+    """Return the process-wide inventory, loading it on first use."""
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = Inventory.load()
+    return _inventory
+
+def set_inventory(inventory: Optional[Inventory]):
+    """Replace the process-wide inventory (None reloads it from INVENTORY_DIR on next use)."""
+    global _inventory
+    _inventory = inventory
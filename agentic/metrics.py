@@ -0,0 +1,211 @@
+"""Stage timings, histograms and counters, exported in the Prometheus text format.
+
+Stages are timed with ``span(stage)`` or ``@timed(stage)`` into the
+``travel_stage_seconds`` histogram. Within ``trace()``, the spans of the
+current request are also collected, e.g. for a timing panel; the trace follows
+asyncio tasks and, through ``contextvars.copy_context()``, worker threads.
+With METRICS_ENABLED=0, spans and counters cost a single flag check.
+"""
+from contextlib import contextmanager
+import bisect
+import contextvars
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800, 1600)
+
+def set_enabled(enabled: bool):
+    """Turn recording on or off for the whole process."""
+    global METRICS_ENABLED
+    METRICS_ENABLED = bool(enabled)
+
+def _labels(label: str, value: str, extra: str = "") -> str:
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{{{label}="{escaped}"{extra}}}' if label else (f"{{{extra[1:]}}}" if extra else "")
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Histogram with fixed buckets, one series per value of its label."""
+
+    def __init__(self, name: str, description: str, label: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [counts per bucket plus +Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label: str = ""):
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return ``{label value: {"count", "sum"}}``."""
+        with self._lock:
+            return {label: {"count": sum(counts), "sum": total} for label, (counts, total) in self._series.items()}
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(label, list(counts), total) for label, (counts, total) in sorted(self._series.items())]
+        for label, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f',le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label, label, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, label)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label, label)} {cumulative}")
+        return lines
+
+class Counter:
+    """Monotonic counter, one series per value of its label."""
+
+    def __init__(self, name: str, description: str, label: str):
+        self.name = name
+        self.description = description
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, label: str = "", amount: float = 1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label] = self._values.get(label, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+def _family(name, kind, description, label, values: Dict[str, float]) -> List[str]:
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(label, value)} {_number(amount)}" for value, amount in sorted(values.items())]
+    return lines
+
+STAGE_SECONDS = Histogram("travel_stage_seconds", "Time spent in each stage of a request.", "stage")
+LLM_FIRST_TOKEN_SECONDS = Histogram("travel_llm_first_token_seconds",
+                                    "Time from an LLM call to its first token.", "backend")
+LLM_TOKENS_PER_SECOND = Histogram("travel_llm_tokens_per_second",
+                                  "LLM output tokens per second while generating.", "backend", TOKEN_RATE_BUCKETS)
+CACHE_HITS = Counter("travel_cache_hits_total", "Cache lookups that found an entry.", "cache")
+CACHE_MISSES = Counter("travel_cache_misses_total", "Cache lookups that found nothing.", "cache")
+
+# Callables returning (name, kind, description, label, {label value: number}) families, read at export time
+_collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+def register_collector(collect: Callable[[], Iterable[Tuple]]):
+    """Export values kept elsewhere (caches, the LLM guard, ...) with the metrics."""
+    _collectors.append(collect)
+
+def cache_families(caches: Dict[str, Tuple[int, int]]) -> List[Tuple]:
+    """Families for caches that count their own ``(hits, misses)``, keyed by cache name."""
+    return [
+        ("travel_cache_hits_total", "counter", "Cache lookups that found an entry.", "cache",
+         {name: hits for name, (hits, _) in caches.items()}),
+        ("travel_cache_misses_total", "counter", "Cache lookups that found nothing.", "cache",
+         {name: misses for name, (_, misses) in caches.items()}),
+    ]
+
+def render_prometheus() -> str:
+    """Return every metric in the Prometheus text exposition format."""
+    families = {}  # name -> (kind, description, label, values), merging collectors and built-in counters
+    for counter in (CACHE_HITS, CACHE_MISSES):
+        families[counter.name] = ("counter", counter.description, counter.label, counter.snapshot())
+    for collect in list(_collectors):
+        for name, kind, description, label, values in collect():
+            if name in families:
+                families[name][3].update(values)
+            else:
+                families[name] = (kind, description, label, dict(values))
+
+    lines = STAGE_SECONDS.expose() + LLM_FIRST_TOKEN_SECONDS.expose() + LLM_TOKENS_PER_SECOND.expose()
+    for name, (kind, description, label, values) in families.items():
+        lines += _family(name, kind, description, label, values)
+        # Every hits/misses counter pair also gets a hit ratio gauge
+        prefix = name[:-len("_hits_total")]
+        if name.endswith("_hits_total") and f"{prefix}_misses_total" in families:
+            misses = families[f"{prefix}_misses_total"][3]
+            lookups = {cache: values.get(cache, 0) + misses.get(cache, 0) for cache in {*values, *misses}}
+            ratios = {cache: values.get(cache, 0) / total for cache, total in lookups.items() if total}
+            lines += _family(f"{prefix}_hit_ratio", "gauge", "Share of cache lookups that found an entry.",
+                             label, ratios)
+    return "\n".join(lines) + "\n"
+
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+def record(stage: str, seconds: float):
+    """Record a stage's duration, also in the current trace if there is one."""
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, stage)
+    spans = _trace.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.started)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(stage: str):
+    """Context manager timing a stage (a shared no-op when metrics are disabled)."""
+    return _Span(stage) if METRICS_ENABLED else _NO_SPAN
+
+def timed(stage: str):
+    """Decorator timing every call of a function as a stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED:
+                return func(*args, **kwargs)
+            with _Span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def trace():
+    """Collect the ``(stage, seconds)`` spans recorded in this context, in the order they finish."""
+    spans = []
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
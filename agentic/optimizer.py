@@ -0,0 +1,121 @@
+import math
+from typing import Collection, List, Optional, Sequence
+
+import numpy as np
+
+from . import ranking
+from .costing import TripCosts, trip_costs
+from .interface import Activity, Flight, Hotel, Itinerary, TravelRequest
+
+MAX_CAPACITY = 4096  # Budget cells in the activity knapsack; larger budgets use coarser cells
+ACTIVITIES_PER_DAY = 2  # Most activities planned per night of the stay
+
+def _knapsack(costs: np.ndarray, values: np.ndarray, capacity: int, max_items: int):
+    """0/1 knapsack over activities taking at most ``max_items``, solved for every capacity at once.
+
+    Returns ``(best, take)``: ``best[k, c]`` is the highest total value of at most
+    ``k`` activities costing at most ``c`` cells and ``take[i, k, c]`` records that
+    activity ``i`` improved cell ``(k, c)``, for reconstructing the chosen set.
+    """
+    best = np.zeros((max_items + 1, capacity + 1))
+    take = np.zeros((len(costs), max_items + 1, capacity + 1), dtype=bool)
+    if max_items <= 0:
+        return best, take
+    for i, (cost, value) in enumerate(zip(costs.tolist(), values.tolist())):
+        if cost > capacity or value <= 0:
+            continue
+        # Every count at once, from the values before this activity
+        candidate = best[:-1, :capacity + 1 - cost] + value
+        improved = candidate > best[1:, cost:]
+        take[i, 1:, cost:] = improved
+        best[1:, cost:] = np.where(improved, candidate, best[1:, cost:])
+    return best, take
+
+def _chosen(take: np.ndarray, costs: np.ndarray, items: int, capacity: int) -> List[int]:
+    chosen = []
+    for i in range(len(costs) - 1, -1, -1):
+        if items and take[i, items, capacity]:
+            chosen.append(i)
+            items -= 1
+            capacity -= int(costs[i])
+    return chosen[::-1]
+
+def optimize_itinerary(request: TravelRequest, flights: Sequence[Flight], hotels: Sequence[Hotel],
+                       activities: Sequence[Activity], costs: Optional[TripCosts] = None,
+                       budget: Optional[float] = None, missing: Collection[str] = ()) -> Optional[Itinerary]:
+    """Choose one flight, one hotel and a set of activities that fit the budget together.
+
+    The itinerary maximizes the sum of the offers' ranking scores (see
+    ``ranking.score_offers``), so it favours well-rated, interest-matching offers
+    and fills leftover budget with more activities. The activities are a 0/1
+    knapsack solved once for every leftover budget; flight x hotel pairs are then
+    searched best flight first, stopping once no remaining flight can beat the best
+    itinerary found. At most ``ACTIVITIES_PER_DAY`` activities are planned per
+    night. Returns None when no flight and hotel fit the budget.
+
+    Offers are costed for the whole trip with ``costs`` (the request's trip length
+    and party size by default). No flights or no hotels also means no itinerary,
+    unless that source failed (is in ``missing``): then that part is left out.
+    """
+    missing = set(missing)
+    if not flights and "flights" not in missing or not hotels and "hotels" not in missing:
+        return None
+    if not (flights or hotels or activities):
+        return None
+    costs = costs or trip_costs(request)
+    budget = float(request.budget if budget is None else budget)
+    cell = max(budget / MAX_CAPACITY, 1.0)
+    capacity = int(budget // cell)
+
+    # Activity costs round up to whole cells, so every chosen set really fits
+    activity_prices = np.fromiter((activity.price for activity in activities), dtype=np.float64,
+                                  count=len(activities)) * costs.units("activities")
+    activity_costs = np.ceil(activity_prices / cell - 1e-9).astype(np.int64)
+    max_items = min(len(activities), ACTIVITIES_PER_DAY * max(costs.nights, 1))
+    best, take = _knapsack(activity_costs, ranking.score_records("activities", request, activities), capacity,
+                           max_items)
+    best = best[-1]
+
+    # An offer kind from a failed source is a single free option worth nothing
+    if flights:
+        flight_costs = np.array([flight.price for flight in flights], dtype=np.float64) * costs.units("flights")
+        flight_scores = ranking.score_records("flights", request, flights)
+    else:
+        flight_costs, flight_scores = np.zeros(1), np.zeros(1)
+    if hotels:
+        hotel_costs = np.array([hotel.price for hotel in hotels], dtype=np.float64) * costs.units("hotels")
+        hotel_scores = ranking.score_records("hotels", request, hotels)
+    else:
+        hotel_costs, hotel_scores = np.zeros(1), np.zeros(1)
+
+    bound = hotel_scores.max() + best[-1]
+    best_score, best_pick = -math.inf, None
+    for f in np.argsort(-flight_scores, kind="stable").tolist():
+        # Flights are visited best first, so no later flight can do better either
+        if flight_scores[f] + bound <= best_score:
+            break
+        leftover = budget - flight_costs[f] - hotel_costs
+        feasible = np.flatnonzero(leftover >= 0)
+        if not len(feasible):
+            continue
+        cells = np.minimum(np.floor(leftover[feasible] / cell + 1e-9).astype(np.int64), capacity)
+        totals = flight_scores[f] + hotel_scores[feasible] + best[cells]
+        j = int(np.argmax(totals))
+        if totals[j] > best_score:
+            best_score, best_pick = float(totals[j]), (f, int(feasible[j]), int(cells[j]))
+
+    if best_pick is None:
+        return None
+    f, h, cells = best_pick
+    chosen = tuple(activities[i] for i in _chosen(take, activity_costs, max_items, cells))
+    flight = flights[f] if flights else None
+    hotel = hotels[h] if hotels else None
+    return Itinerary(
+        flight=flight,
+        hotel=hotel,
+        activities=chosen,
+        nights=costs.nights,
+        travelers=costs.travelers,
+        cost=costs.breakdown(flight, hotel, chosen).total,
+        score=best_score,
+    )
@@ -0,0 +1,100 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .costing import trip_costs
+from .interface import TravelRequest
+
+# Price multiplier and class/type label applied per travel style
+FLIGHT_STYLES = {
+    "Luxury": (1.5, "Business"),
+    "Budget": (0.8, "Economy"),
+}
+ACTIVITY_STYLES = {
+    "Luxury": (1.3, "Private"),
+    "Budget": (0.9, "Group"),
+}
+
+# Hotel prices rise 25% per traveler beyond the first two
+HOTEL_BASE_TRAVELERS = 2
+HOTEL_TRAVELER_SURCHARGE = 0.25
+
+# Share of the total budget a single offer may cost over the whole trip
+# (all travelers, both flight legs, every night; see costing.TripCosts)
+BUDGET_SHARE = {
+    "flights": 1.0,
+    "hotels": 1.0,
+    "activities": 1 / 10,  # Assuming ~10 activities
+}
+
+KINDS = tuple(BUDGET_SHARE)
+
+def _style_multipliers(styles: np.ndarray, table) -> np.ndarray:
+    unique, inverse = np.unique(styles, return_inverse=True)
+    factors = np.array([table.get(style, (1.0, None))[0] for style in unique], dtype=np.float64)
+    return factors[inverse]
+
+def request_factors(kind: str, requests: Sequence[TravelRequest]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the price multiplier and the maximum priced offer for each request.
+
+    Both are float arrays of length ``len(requests)``: an offer with base price
+    ``p`` costs ``p * multiplier`` and is affordable when that is ``<= cap``.
+    Caps are per priced unit (person and leg, night, or person), from each
+    request's trip length and party size.
+    """
+    count = len(requests)
+    budgets = np.fromiter((request.budget for request in requests), dtype=np.float64, count=count)
+    if kind == "flights":
+        styles = np.array([request.travel_style for request in requests], dtype=object)
+        multipliers = _style_multipliers(styles, FLIGHT_STYLES) if count else np.ones(0)
+    elif kind == "activities":
+        styles = np.array([request.travel_style for request in requests], dtype=object)
+        multipliers = _style_multipliers(styles, ACTIVITY_STYLES) if count else np.ones(0)
+    elif kind == "hotels":
+        travelers = np.fromiter((request.travelers for request in requests), dtype=np.float64, count=count)
+        multipliers = 1 + np.maximum(travelers - HOTEL_BASE_TRAVELERS, 0) * HOTEL_TRAVELER_SURCHARGE
+    else:
+        raise ValueError(f"Unknown offer kind: {kind}")
+    units = np.fromiter((trip_costs(request).units(kind) for request in requests), dtype=np.float64, count=count)
+    return multipliers, budgets * BUDGET_SHARE[kind] / units
+
+def style_label(kind: str, travel_style: str) -> Optional[str]:
+    """Return the class (flights) or type (activities) label for a travel style, if any."""
+    table = {"flights": FLIGHT_STYLES, "activities": ACTIVITY_STYLES}.get(kind, {})
+    return table.get(travel_style, (1.0, None))[1]
+
+def max_base_price(kind: str, request: TravelRequest) -> float:
+    """Return the highest base price an offer may have to fit the request's budget."""
+    multipliers, caps = request_factors(kind, [request])
+    return float(caps[0] / multipliers[0])
+
+def price_cap(kind: str, request: TravelRequest) -> float:
+    """Return the most a single priced offer may cost within the request's budget."""
+    _, caps = request_factors(kind, [request])
+    return float(caps[0])
+
+def price_offers(kind: str, base_prices: np.ndarray, request: TravelRequest) -> np.ndarray:
+    """Return the prices of offers for a single request."""
+    multipliers, _ = request_factors(kind, [request])
+    return base_prices * multipliers[0] if multipliers[0] != 1.0 else base_prices.copy()
+
+def price_matrix(kind: str, base_prices: np.ndarray, requests: Sequence[TravelRequest]) -> np.ndarray:
+    """Return a ``(len(requests), len(base_prices))`` matrix of offer prices per request."""
+    multipliers, _ = request_factors(kind, requests)
+    return np.multiply.outer(multipliers, np.asarray(base_prices, dtype=np.float64))
+
+def affordable_matrix(kind: str, base_prices: np.ndarray, requests: Sequence[TravelRequest]) -> np.ndarray:
+    """Return a boolean matrix marking the offers within each request's budget."""
+    multipliers, caps = request_factors(kind, requests)
+    prices = np.multiply.outer(multipliers, np.asarray(base_prices, dtype=np.float64))
+    return prices <= caps[:, None]
+
+def count_affordable(kind: str, base_prices: np.ndarray, requests: Sequence[TravelRequest]) -> np.ndarray:
+    """Return how many offers fit each request's budget, without building the full matrix.
+
+    Sorts the base prices once and binary-searches each request's price cap, so it
+    scales to large request x offer batches in O((R + N) log N).
+    """
+    multipliers, caps = request_factors(kind, requests)
+    ordered = np.sort(np.asarray(base_prices, dtype=np.float64))
+    return np.searchsorted(ordered, caps / multipliers, side="right")
@@ -0,0 +1,99 @@
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from . import pricing
+from .interface import TravelRequest
+
+class ScoringWeights(NamedTuple):
+    """Relative weight of each scoring term; see ``score_offers``."""
+    price: float
+    rating: float
+    interest: float
+
+# Weights per travel style: budget travellers care most about price, luxury ones about rating
+STYLE_WEIGHTS = {
+    "Balanced": ScoringWeights(price=0.4, rating=0.4, interest=0.2),
+    "Luxury": ScoringWeights(price=0.1, rating=0.6, interest=0.3),
+    "Budget": ScoringWeights(price=0.7, rating=0.2, interest=0.1),
+    "Adventure": ScoringWeights(price=0.3, rating=0.3, interest=0.4),
+    "Cultural": ScoringWeights(price=0.3, rating=0.3, interest=0.4),
+    "Relaxation": ScoringWeights(price=0.3, rating=0.5, interest=0.2),
+}
+DEFAULT_WEIGHTS = STYLE_WEIGHTS["Balanced"]
+
+MAX_RATING = 10.0
+
+# Activity categories matching each interest
+INTEREST_CATEGORIES = {
+    "History": ["History"],
+    "Food": ["Food"],
+    "Nature": ["Relaxation", "Sports"],
+    "Shopping": ["Shopping"],
+    "Art": ["Art"],
+    "Nightlife": ["Nightlife"],
+    "Sports": ["Sports"]
+}
+
+# Offers returned per lookup when no limit is given
+DEFAULT_LIMITS = {
+    "flights": 10,
+    "hotels": 10,
+    "activities": 15,
+}
+
+def score_offers(request: TravelRequest, prices: np.ndarray, price_cap: float,
+                 ratings: Optional[np.ndarray] = None, matches: Optional[np.ndarray] = None,
+                 weights: Optional[ScoringWeights] = None) -> np.ndarray:
+    """Score offers for a request; higher is better.
+
+    Each term is scaled to [0, 1] and weighted by the request's travel style
+    (``STYLE_WEIGHTS``) unless ``weights`` is given::
+
+        score = w.price    * (1 - price / price_cap)   # cheaper relative to the budget cap
+              + w.rating   * rating / MAX_RATING       # guest rating, if the offer has one
+              + w.interest * match                     # 1 if the offer matches the traveler's interests
+
+    Offers without ratings or interest information score 0 on that term.
+    """
+    weights = weights or STYLE_WEIGHTS.get(request.travel_style, DEFAULT_WEIGHTS)
+    scores = weights.price * np.clip(1 - prices / price_cap, 0, 1) if price_cap > 0 else np.zeros(len(prices))
+    if ratings is not None:
+        scores = scores + weights.rating * np.clip(ratings / MAX_RATING, 0, 1)
+    if matches is not None:
+        scores = scores + weights.interest * matches.astype(np.float64)
+    return scores
+
+def interest_categories(interests: Sequence[str]) -> List[str]:
+    """Return the activity categories matching any of the interests."""
+    return [category for interest in interests for category in INTEREST_CATEGORIES.get(interest, [])]
+
+def score_records(kind: str, request: TravelRequest, offers: Sequence) -> np.ndarray:
+    """Score already priced offer records (as returned by the workflow lookups)."""
+    prices = np.fromiter((offer.price for offer in offers), dtype=np.float64, count=len(offers))
+    ratings = matches = None
+    if kind == "hotels":
+        ratings = np.fromiter((hotel.rating for hotel in offers), dtype=np.float64, count=len(offers))
+        wanted = request.accommodation_type.casefold()
+        matches = np.array([hotel.type.casefold() == wanted for hotel in offers], dtype=bool)
+    elif kind == "activities":
+        categories = {category.casefold() for category in interest_categories(request.interests)}
+        if categories:
+            matches = np.array([activity.category.casefold() in categories for activity in offers], dtype=bool)
+    return score_offers(request, prices, pricing.price_cap(kind, request), ratings=ratings, matches=matches)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the positions of the ``k`` best scores, best first.
+
+    Uses ``np.argpartition`` to select the top ``k`` in linear time and only sorts
+    those, so picking the best few out of a large inventory never sorts all of it.
+    Ties keep their original order.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
@@ -0,0 +1,88 @@
+import functools
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .metrics import cache_families, register_collector, timed
+
+# Directory with index.json, one JSON file per destination and _general.json
+TIPS_DIR = os.getenv(
+    "TIPS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tips"),
+)
+TIPS_CACHE_SIZE = int(os.getenv("TIPS_CACHE_SIZE", 64))  # Destination tip sheets kept in memory
+
+# Categories returned by get_local_tips(), in display order
+TIP_CATEGORIES = ["dining", "money_saving", "transportation", "language", "safety"]
+
+def _key(destination: str) -> str:
+    return " ".join(str(destination).casefold().split())
+
+class TipsIndex:
+    """Maps destination names and aliases to tip sheet files; sheets load lazily."""
+
+    def __init__(self, directory: str = TIPS_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            entries = json.load(f)
+        self.files = {}
+        for key, entry in entries.items():
+            for name in (key, entry.get("name", key), *entry.get("aliases", [])):
+                self.files[_key(name)] = entry["file"]
+        # Each index has its own bounded cache of loaded sheets
+        self._load = functools.lru_cache(maxsize=TIPS_CACHE_SIZE)(self._read)
+
+    def _read(self, filename: str) -> Dict:
+        with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+            return json.load(f)
+
+    def find(self, destination: str) -> Optional[str]:
+        key = _key(destination)
+        return self.files.get(key) or self.files.get(_key(key.split(",")[0]))
+
+    def sheet(self, destination: str) -> Optional[Dict]:
+        """Return the tip sheet for a destination, or None if there is none."""
+        filename = self.find(destination)
+        return self._load(filename) if filename else None
+
+    def general(self) -> Dict:
+        """Return the general tips shown for destinations without a sheet."""
+        return self._load("_general.json")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_tips_index() -> TipsIndex:
+    """Return the process-wide tips index, loading it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TipsIndex()
+    return _index
+
+@timed("tips")
+def get_tip_sheet(destination: str) -> Optional[Dict]:
+    """Return the full tip sheet (tabs, columns, phrases and notes) for a destination."""
+    return get_tips_index().sheet(destination)
+
+def _collect():
+    index = _index
+    if index is None:
+        return []
+    info = index._load.cache_info()
+    return cache_families({"tips": (info.hits, info.misses)})
+
+register_collector(_collect)
+
+def flatten_tips(sheet: Optional[Dict]) -> Dict[str, List[str]]:
+    """Flatten a tip sheet into a list of tips per category."""
+    tips = {category: [] for category in TIP_CATEGORIES}
+    for category in (sheet or {}).get("categories", []):
+        items = tips.setdefault(category["id"], [])
+        for column in category.get("columns", []):
+            for block in column:
+                items.extend(block["items"])
+        items.extend(f"{translation} - {phrase}" for phrase, translation in category.get("phrases", []))
+    return tips
@@ -0,0 +1,205 @@
+import csv
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .dates import DateRange, parse_date_range
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Directory with normals.csv (monthly climate normals per city) and the daily table built from it
+CLIMATE_DIR = os.getenv(
+    "CLIMATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "climate"),
+)
+DEFAULT_CITY = "_default"  # Row used for destinations without their own normals
+
+# Daily table columns
+HIGH, LOW, RAIN_CHANCE = range(3)
+
+# Day-of-year offsets of each month in a leap year, so the table has a row for Feb 29
+_MONTH_OFFSETS = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+                "August", "September", "October", "November", "December"]
+
+# Each day draws its condition: wet with its rain chance (the heavier half of wet draws
+# is rain, the rest showers), otherwise partly cloudy for CLOUDY_SHARE of dry draws
+RAINY = ("🌧️", "Rainy")
+SHOWERS = ("🌦️", "Light Showers")
+PARTLY_CLOUDY = ("🌤️", "Partly Cloudy")
+SUNNY = ("☀️", "Sunny")
+CLOUDY_SHARE = 0.3
+FALLBACK_DAYS = 5  # Days shown when the dates cannot be parsed
+
+def _city_key(city: str) -> str:
+    return " ".join(str(city).casefold().split())
+
+def build_climatology(normals_path: str):
+    """Interpolate monthly normals into a (cities, 366 days, 3) float32 table.
+
+    Monthly values are anchored mid-month and interpolated linearly, wrapping
+    around the year end.
+    """
+    normals: Dict[str, np.ndarray] = {}
+    with open(normals_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            monthly = normals.setdefault(row["city"], np.zeros((12, 3), dtype=np.float64))
+            monthly[int(row["month"]) - 1] = (float(row["high"]), float(row["low"]), float(row["rain_chance"]))
+
+    anchors = _MONTH_OFFSETS[:12] + 14.5
+    days = np.arange(366)
+    # Pad the anchors one month either side so the interpolation wraps
+    xp = np.concatenate(([anchors[-1] - 366], anchors, [anchors[0] + 366]))
+
+    cities = sorted(normals)
+    table = np.empty((len(cities), 366, 3), dtype=np.float32)
+    for i, city in enumerate(cities):
+        monthly = normals[city]
+        for column in range(3):
+            fp = np.concatenate(([monthly[-1, column]], monthly[:, column], [monthly[0, column]]))
+            table[i, :, column] = np.interp(days, xp, fp)
+    return {_city_key(city): i for i, city in enumerate(cities)}, table
+
+class Climatology:
+    """Per-city daily climate normals, memory-mapped from the precomputed table."""
+
+    def __init__(self, index: Dict[str, int], table: np.ndarray):
+        self.index = index
+        self.table = table
+
+    @classmethod
+    def load(cls, directory: str = CLIMATE_DIR) -> "Climatology":
+        """Load the daily table, rebuilding it first if it is missing or older than the normals."""
+        normals_path = os.path.join(directory, "normals.csv")
+        table_path = os.path.join(directory, "climatology.npy")
+        index_path = os.path.join(directory, "climatology.json")
+
+        stale = not (os.path.exists(table_path) and os.path.exists(index_path)) or \
+            os.path.getmtime(table_path) < os.path.getmtime(normals_path)
+        if stale:
+            index, table = build_climatology(normals_path)
+            try:
+                cls._write(directory, table_path, index_path, index, table)
+            except OSError as e:
+                # Read-only deployments still work, just without the memory map
+                logger.warning(f"Could not save climatology table to {directory}: {str(e)}")
+                return cls(index, table)
+
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        return cls(index, np.load(table_path, mmap_mode="r"))
+
+    @staticmethod
+    def _write(directory, table_path, index_path, index, table):
+        # Write to temporary files and rename, so concurrent readers never see a partial table
+        fd, tmp_table = tempfile.mkstemp(dir=directory, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, table)
+        fd, tmp_index = tempfile.mkstemp(dir=directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_index, index_path)
+        os.replace(tmp_table, table_path)
+
+    def city_row(self, destination: str) -> int:
+        """Return the table row for a destination, falling back to the default climate."""
+        key = _city_key(destination)
+        if key not in self.index:
+            key = _city_key(key.split(",")[0])
+        return self.index.get(key, self.index[DEFAULT_CITY])
+
+    def has_city(self, destination: str) -> bool:
+        return self.city_row(destination) != self.index[DEFAULT_CITY]
+
+    def daily(self, destination: str, days: np.ndarray) -> np.ndarray:
+        """Return the (len(days), 3) normals for an array of datetime64[D] days."""
+        months = days.astype("datetime64[M]")
+        day_of_month = (days - months).astype(np.int64)
+        day_of_year = _MONTH_OFFSETS[months.astype(np.int64) % 12] + day_of_month
+        return np.asarray(self.table[self.city_row(destination), day_of_year])
+
+_climatology = None
+_climatology_lock = threading.Lock()
+
+def get_climatology() -> Climatology:
+    """Return the process-wide climatology, loading it on first use."""
+    global _climatology
+    if _climatology is None:
+        with _climatology_lock:
+            if _climatology is None:
+                _climatology = Climatology.load()
+    return _climatology
+
+def daily_draws(destination: str, days: np.ndarray) -> np.ndarray:
+    """Return one uniform [0, 1) draw per day, the same for a city and date on every call."""
+    city = _city_key(destination)
+    return np.array([int.from_bytes(hashlib.blake2b(f"{city}|{day}".encode("utf-8"), digest_size=8).digest(),
+                                    "big") / 2.0 ** 64 for day in days.tolist()])
+
+def condition(rain_chance: float, draw: float):
+    """Return the (icon, condition) of a day with this rain chance (%) and draw."""
+    wet = rain_chance / 100
+    if draw < wet:
+        return RAINY if draw < wet / 2 else SHOWERS
+    return PARTLY_CLOUDY if draw < wet + (1 - wet) * CLOUDY_SHARE else SUNNY
+
+class WeatherForecast:
+    """Daily forecast for a trip, with summary statistics computed over the whole range."""
+
+    def __init__(self, labels: List[str], normals: np.ndarray, draws: Optional[np.ndarray] = None):
+        self.labels = labels
+        self.normals = np.asarray(normals, dtype=np.float64)
+        self.highs = np.rint(self.normals[:, HIGH]).astype(int)
+        self.lows = np.rint(self.normals[:, LOW]).astype(int)
+        self.rain_chances = np.rint(self.normals[:, RAIN_CHANCE]).astype(int)
+        self.draws = np.full(len(labels), 0.5) if draws is None else draws
+
+    @property
+    def days(self) -> List[Dict]:
+        """One display row per day: date, icon, temp, condition and precipitation."""
+        rows = []
+        for label, high, low, rain, draw in zip(self.labels, self.highs.tolist(), self.lows.tolist(),
+                                                self.rain_chances.tolist(), self.draws.tolist()):
+            icon, condition_name = condition(rain, draw)
+            rows.append({
+                "date": label,
+                "icon": icon,
+                "temp": f"{high}°C/{low}°C",
+                "condition": condition_name,
+                "precipitation": f"{rain}%"
+            })
+        return rows
+
+    @property
+    def summary(self) -> Dict:
+        if not len(self.labels):
+            return {"avg_high": 0.0, "avg_low": 0.0, "rainy_days": 0}
+        return {
+            "avg_high": round(float(self.normals[:, HIGH].mean()), 1),
+            "avg_low": round(float(self.normals[:, LOW].mean()), 1),
+            "rainy_days": int(np.rint(self.normals[:, RAIN_CHANCE].sum() / 100)),  # Expected number
+        }
+
+@timed("weather")
+def get_forecast(destination: str, dates: str, date_range: Optional[DateRange] = None) -> WeatherForecast:
+    """Build the forecast for a destination from climate normals for the travel dates.
+
+    Dates that cannot be parsed fall back to the next few days, labelled "Day 1", "Day 2", ...
+    """
+    date_range = date_range or parse_date_range(dates)
+    if date_range is None:
+        start = np.datetime64(datetime.date.today(), "D")
+        days = start + np.arange(FALLBACK_DAYS)
+        labels = [f"Day {i + 1}" for i in range(FALLBACK_DAYS)]
+    else:
+        days = np.datetime64(date_range.start, "D") + np.arange(date_range.days)
+        labels = [f"{_MONTH_NAMES[day.month - 1]} {day.day}, {day.year}" for day in date_range.dates()]
+    return WeatherForecast(labels, get_climatology().daily(destination, days), daily_draws(destination, days))
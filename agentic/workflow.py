@@ -1,220 +1,175 @@
-from typing import List, Dict
-from .interface import TravelRequest, TravelRecommendation
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+from .interface import Activity, Flight, Hotel, TravelRequest, TravelRecommendation
+from .inventory import get_inventory
+from .metrics import span, timed
+from .optimizer import optimize_itinerary
+from .tips import flatten_tips, get_tip_sheet
+from .weather import get_forecast
+from . import pricing, ranking
+import asyncio
+import contextvars
+import logging
 import random
 
-def get_flights(request: TravelRequest) -> List[Dict]:
-    """Retrieve flight options based on the travel request."""
-    # Simulate retrieving flight information from an API
-    destination = request.destination.lower()
-
-    # Base flights data
-    flights = [
-        {"airline": "Air France", "departure": "08:00", "arrival": "10:00", "price": 300.0},
-        {"airline": "Lufthansa", "departure": "10:30", "arrival": "12:30", "price": 350.0},
-        {"airline": "British Airways", "departure": "14:00", "arrival": "16:00", "price": 380.0},
-        {"airline": "KLM", "departure": "16:30", "arrival": "18:30", "price": 320.0},
-        {"airline": "Tarom", "departure": "12:00", "arrival": "14:00", "price": 500.0},
-    ]
-
-    # Adjust prices based on travel style
-    if request.travel_style == "Luxury":
-        for flight in flights:
-            flight["price"] *= 1.5
-            flight["class"] = "Business"
-    elif request.travel_style == "Budget":
-        for flight in flights:
-            flight["price"] *= 0.8
-            flight["class"] = "Economy"
-
-    # Filter flights based on budget
-    return [flight for flight in flights if flight["price"] <= request.budget]
-
-def get_hotels(request: TravelRequest) -> List[Dict]:
-    """Retrieve hotel options based on the travel request."""
-    # Simulate retrieving hotel information from an API
-    destination = request.destination.lower()
-
-    # Base hotels data
-    hotels = [
-        {"name": "Zoku Paris", "rating": 8.9, "price": 250.0, "type": "Hotel"},
-        {"name": "Villa M", "rating": 8.8, "price": 450.0, "type": "Boutique"},
-        {"name": "Citizen M", "rating": 8.7, "price": 200.0, "type": "Hotel"},
-        {"name": "Generator Paris", "rating": 8.2, "price": 120.0, "type": "Hostel"},
-        {"name": "Le Bristol Paris", "rating": 9.5, "price": 950.0, "type": "Luxury"},
-        {"name": "Airbnb in Le Marais", "rating": 8.6, "price": 180.0, "type": "Apartment"},
-    ]
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-source timeouts (seconds) used by travel_recommendation()
+SOURCE_TIMEOUTS = {
+    "flights": 5.0,
+    "hotels": 5.0,
+    "activities": 5.0,
+    "travel_plan": 60.0,
+}
+
+# Shared pool for blocking lookups. A dedicated pool (rather than the loop's default
+# executor) lets asyncio.run() return as soon as a timed-out source is abandoned.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="travel-source")
+
+def _rank(kind: str, request: TravelRequest, rows, prices, limit: Optional[int],
+          ratings=None, matches=None):
+    """Keep the best ``limit`` offers, best first; see ``ranking.score_offers``."""
+    if limit is None:
+        limit = ranking.DEFAULT_LIMITS[kind]
+    scores = ranking.score_offers(request, prices, pricing.price_cap(kind, request),
+                                  ratings=ratings, matches=matches)
+    best = ranking.top_k(scores, limit)
+    return rows[best], prices[best]
+
+@timed("flights")
+def get_flights(request: TravelRequest, limit: Optional[int] = None) -> List[Flight]:
+    """Retrieve the best flight options for the travel request, best first."""
+    table = get_inventory().flights
+
+    # Filter flights based on budget, through the price index
+    rows = table.query(request.destination, max_price=pricing.max_base_price("flights", request))
+
+    # Price copies of the shared records based on travel style, then keep the best
+    prices = pricing.price_offers("flights", table.columns["price"][rows], request)
+    rows, prices = _rank("flights", request, rows, prices, limit)
+    travel_class = pricing.style_label("flights", request.travel_style)
+    return [flight._replace(price=price, travel_class=travel_class)
+            for flight, price in zip(table.records(rows), prices.tolist())]
+
+@timed("hotels")
+def get_hotels(request: TravelRequest, limit: Optional[int] = None) -> List[Hotel]:
+    """Retrieve the best hotel options for the travel request, best first."""
+    table = get_inventory().hotels
 
     # Adjust based on accommodation preference
-    preferred_hotels = [hotel for hotel in hotels if hotel["type"].lower() == request.accommodation_type.lower()]
-    if not preferred_hotels:
-        preferred_hotels = hotels
-
-    # Adjust prices based on number of travelers
-    for hotel in preferred_hotels:
-        if request.travelers > 2:
-            hotel["price"] *= (1 + (request.travelers - 2) * 0.25)  # 25% increase per additional traveler
-
-    # Filter hotels based on budget (per night)
-    return [hotel for hotel in preferred_hotels if hotel["price"] <= request.budget / 5]  # Assuming 5-night stay
-
-def get_activities(request: TravelRequest) -> List[Dict]:
-    """Retrieve activity options based on the travel request."""
-    # Simulate retrieving activity information from an API
-    destination = request.destination.lower()
-
-    # Base activities data for Paris
-    activities = [
-        {"name": "Louvre Museum", "duration": "3 hours", "price": 17.0, "category": "Art"},
-        {"name": "Eiffel Tower", "duration": "2 hours", "price": 26.8, "category": "Sightseeing"},
-        {"name": "Seine River Cruise", "duration": "1 hour", "price": 15.0, "category": "Relaxation"},
-        {"name": "Montmartre Walking Tour", "duration": "2 hours", "price": 25.0, "category": "History"},
-        {"name": "Cooking Class", "duration": "3 hours", "price": 95.0, "category": "Food"},
-        {"name": "Wine Tasting", "duration": "2 hours", "price": 65.0, "category": "Food"},
-        {"name": "Versailles Palace", "duration": "4 hours", "price": 18.0, "category": "History"},
-        {"name": "Moulin Rouge Show", "duration": "2 hours", "price": 115.0, "category": "Nightlife"},
-        {"name": "Bike Tour", "duration": "3 hours", "price": 35.0, "category": "Sports"},
-        {"name": "Admission to Disneyland Paris", "duration": "Full day", "price": 100.0, "category": "Entertainment"},
-        {"name": "Sightseeing Cruise from the Eiffel Tower", "duration": "1 hour", "price": 75.0, "category": "Sightseeing"},
-    ]
+    of_type = table.lookup("type", [request.accommodation_type])
+    preferred = table.query(request.destination, within=of_type)
+    if not len(preferred):
+        preferred = None
+
+    # Filter hotels based on budget (per night), with prices adjusted for the number of travelers
+    rows = table.query(request.destination, max_price=pricing.max_base_price("hotels", request), within=preferred)
+    prices = pricing.price_offers("hotels", table.columns["price"][rows], request)
+    rows, prices = _rank("hotels", request, rows, prices, limit,
+                         ratings=table.columns["rating"][rows], matches=np.isin(rows, of_type))
+    return [hotel._replace(price=price) for hotel, price in zip(table.records(rows), prices.tolist())]
+
+@timed("activities")
+def get_activities(request: TravelRequest, limit: Optional[int] = None) -> List[Activity]:
+    """Retrieve the best activity options for the travel request, best first."""
+    table = get_inventory().activities
 
     # Filter based on interests if provided
+    relevant = None
+    of_interest = None
     if request.interests:
-        interest_categories = {
-            "History": ["History"],
-            "Food": ["Food"],
-            "Nature": ["Relaxation", "Sports"],
-            "Shopping": ["Shopping"],
-            "Art": ["Art"],
-            "Nightlife": ["Nightlife"],
-            "Sports": ["Sports"]
-        }
-
-        relevant_categories = []
-        for interest in request.interests:
-            if interest in interest_categories:
-                relevant_categories.extend(interest_categories[interest])
-
-        if relevant_categories:
-            filtered_activities = [activity for activity in activities
-                                  if activity["category"] in relevant_categories]
-            if filtered_activities:
-                activities = filtered_activities
-
-    # Adjust prices based on travel style
-    if request.travel_style == "Luxury":
-        for activity in activities:
-            activity["price"] *= 1.3
-            activity["type"] = "Private"
-    elif request.travel_style == "Budget":
-        for activity in activities:
-            activity["price"] *= 0.9
-            activity["type"] = "Group"
+        categories = ranking.interest_categories(request.interests)
+        if categories:
+            of_interest = table.lookup("category", categories)
+            matching = table.query(request.destination, within=of_interest)
+            if len(matching):
+                relevant = matching
 
     # Filter activities based on budget
-    return [activity for activity in activities if activity["price"] <= request.budget / 10]  # Assuming ~10 activities
+    rows = table.query(request.destination, max_price=pricing.max_base_price("activities", request), within=relevant)
 
-def generate_weather_forecast(dates: str) -> List[Dict]:
+    # Price copies of the shared records based on travel style, then keep the best
+    prices = pricing.price_offers("activities", table.columns["price"][rows], request)
+    matches = np.isin(rows, of_interest) if of_interest is not None else None
+    rows, prices = _rank("activities", request, rows, prices, limit, matches=matches)
+    tour_type = pricing.style_label("activities", request.travel_style)
+    return [activity._replace(price=price, tour_type=tour_type)
+            for activity, price in zip(table.records(rows), prices.tolist())]
+
+def generate_weather_forecast(dates: str, destination: str = "Paris") -> List[Dict]:
     """Generate a weather forecast for the given dates."""
-    if "may" in dates.lower():
-        # Paris in May weather data (historical averages)
-        weather_icons = ["🌤️", "🌦️", "☀️", "🌤️", "☀️"]
-        temperatures = ["19°C/10°C", "18°C/11°C", "21°C/12°C", "20°C/11°C", "22°C/13°C"]
-        conditions = ["Partly Cloudy", "Light Showers", "Sunny", "Partly Cloudy", "Sunny"]
-        precipitation = ["10%", "30%", "5%", "15%", "5%"]
-
-        # Extract the date range
-        date_parts = dates.split("-")
-        if len(date_parts) >= 2:
-            try:
-                start_day = int(date_parts[0].split(" ")[-1])
-                end_day = int(date_parts[1].split(" ")[0])
-                month = date_parts[0].split(" ")[0]
-                year = date_parts[1].split(" ")[-1]
-
-                # Create a row for each day in the range
-                weather_data = []
-                for i, day in enumerate(range(start_day, end_day + 1)):
-                    if i < len(weather_icons):
-                        weather_data.append({
-                            "date": f"{month} {day}, {year}",
-                            "icon": weather_icons[i],
-                            "temp": temperatures[i],
-                            "condition": conditions[i],
-                            "precipitation": precipitation[i]
-                        })
-                return weather_data
-            except (ValueError, IndexError):
-                pass
-
-    # Fallback weather data
-    return [
-        {"date": "Day 1", "icon": "🌤️", "temp": "19°C/10°C", "condition": "Partly Cloudy", "precipitation": "10%"},
-        {"date": "Day 2", "icon": "🌦️", "temp": "18°C/11°C", "condition": "Light Showers", "precipitation": "30%"},
-        {"date": "Day 3", "icon": "☀️", "temp": "21°C/12°C", "condition": "Sunny", "precipitation": "5%"},
-        {"date": "Day 4", "icon": "🌤️", "temp": "20°C/11°C", "condition": "Partly Cloudy", "precipitation": "15%"},
-        {"date": "Day 5", "icon": "☀️", "temp": "22°C/13°C", "condition": "Sunny", "precipitation": "5%"}
-    ]
+    return get_forecast(destination, dates).days
 
 def get_local_tips(destination: str) -> Dict[str, List[str]]:
     """Get local tips for the specified destination."""
-    tips = {
-        "dining": [],
-        "money_saving": [],
-        "transportation": [],
-        "language": [],
-        "safety": []
+    return flatten_tips(get_tip_sheet(destination))
+
+async def _fetch(source: str, func: Callable, *args, timeout: Optional[float] = None):
+    """Run a blocking lookup in a worker thread, bounded by the source timeout."""
+    if timeout is None:
+        timeout = SOURCE_TIMEOUTS.get(source)
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the caller's context, so the worker's spans land in the caller's trace
+    call = contextvars.copy_context().run
+    return await asyncio.wait_for(loop.run_in_executor(_executor, call, func, *args), timeout)
+
+async def travel_recommendation(request: TravelRequest,
+                                plan_generator: Optional[Callable[[TravelRequest], str]] = None,
+                                timeouts: Optional[Dict[str, float]] = None) -> TravelRecommendation:
+    """Generate a complete travel recommendation based on the request.
+
+    Flight, hotel and activity lookups and the travel plan generation run
+    concurrently, so the total latency is that of the slowest source. A source
+    that fails or exceeds its timeout contributes an empty result and an entry
+    in ``TravelRecommendation.errors`` instead of failing the whole request.
+    The offers are then combined into the best itinerary within the budget.
+    """
+    timeouts = {**SOURCE_TIMEOUTS, **(timeouts or {})}
+
+    sources = {
+        "flights": (get_flights, request),
+        "hotels": (get_hotels, request),
+        "activities": (get_activities, request),
     }
-
-    if destination.lower() == "paris":
-        tips["dining"] = [
-            "Ask for 'une carafe d'eau' for free tap water",
-            "Cafés open early (7-8am), lunch is 12-2pm, dinner starts at 7:30pm",
-            "Always greet with 'Bonjour' when entering shops",
-            "Try croissants from award-winning bakeries like Du Pain et des Idées",
-            "Service is included in the bill ('service compris')"
-        ]
-
-        tips["money_saving"] = [
-            "Museums are free on first Sunday of each month",
-            "Buy a carnet of 10 metro tickets (cheaper than singles)",
-            "Eat main meal at lunch with 'formule' menu",
-            "Picnic in parks with baguettes, cheese, and wine",
-            "Use Vélib' bike sharing for short trips"
-        ]
-
-        tips["transportation"] = [
-            "Metro runs 5:30am-1:15am (2:15am weekends)",
-            "RER B train connects CDG airport to central Paris (€11.40)",
-            "Keep ticket until you exit (inspections occur)",
-            "Visit Louvre on Wednesday/Friday evenings to avoid crowds",
-            "Book tickets online to skip lines at major attractions"
-        ]
-
-        tips["language"] = [
-            "Bonjour (bon-zhoor) - Hello",
-            "Merci (mehr-see) - Thank you",
-            "S'il vous plaît (seel voo pleh) - Please",
-            "Excusez-moi (ex-koo-zay mwah) - Excuse me",
-            "L'addition, s'il vous plaît (lah-dee-see-ohn seel voo pleh) - The bill, please"
-        ]
-
-        tips["safety"] = [
-            "Be vigilant on metro line 1 and at tourist spots",
-            "Avoid petition signers (common scam)",
-            "Keep bags zipped and in front of you",
-            "Emergency number: 112",
-            "Drinking water from Wallace fountains is safe"
-        ]
-
-    return tips
-
-def travel_recommendation(request: TravelRequest) -> TravelRecommendation:
-    """Generate a complete travel recommendation based on the request."""
-    flights = get_flights(request)
-    hotels = get_hotels(request)
-    activities = get_activities(request)
+    if plan_generator is not None:
+        sources["travel_plan"] = (plan_generator, request)
+
+    results = await asyncio.gather(
+        *(_fetch(name, func, arg, timeout=timeouts.get(name)) for name, (func, arg) in sources.items()),
+        return_exceptions=True,
+    )
+
+    values = {}
+    errors = {}
+    for name, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            if isinstance(result, asyncio.TimeoutError):
+                errors[name] = f"timed out after {timeouts.get(name)}s"
+            else:
+                errors[name] = str(result) or type(result).__name__
+            logger.warning(f"{name} lookup failed for {request.destination}: {errors[name]}")
+        else:
+            values[name] = result
 
     # In a real implementation, this would call an LLM to generate the travel plan
-    travel_plan = f"Your personalized travel plan for {request.destination} would be generated here."
-
-    return TravelRecommendation(flights, hotels, activities, travel_plan)
+    travel_plan = values.get("travel_plan")
+    if travel_plan is None:
+        travel_plan = f"Your personalized travel plan for {request.destination} would be generated here."
+
+    flights = values.get("flights", [])
+    hotels = values.get("hotels", [])
+    activities = values.get("activities", [])
+
+    # Pick the combination of offers that fits the budget best
+    with span("itinerary"):
+        itinerary = optimize_itinerary(request, flights, hotels, activities, missing=errors)
+
+    return TravelRecommendation(flights,
+                                hotels,
+                                activities,
+                                travel_plan,
+                                errors=errors,
+                                request=request,
+                                itinerary=itinerary)
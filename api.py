@@ -0,0 +1,251 @@
+# api.py
+"""HTTP/JSON API serving recommendations, plans, forecasts and PDFs without Streamlit.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Request bodies are TravelRequest dicts (plus the options below), as JSON or
+msgpack (``Content-Type: application/msgpack``); responses are msgpack when the
+client accepts it. Concurrent identical requests share one computation, and
+every request uses the process-wide LLM client, caches and rate limits.
+
+- ``POST /recommendation``: offers and best itinerary; ``"plan": true`` adds the travel plan
+- ``POST /plan``: the travel plan as text, streamed with ``?stream=true``
+- ``POST /pdf``: the itinerary PDF
+- ``POST /batch``: ``{"requests": [...], "plan": false}``, one result or error per request
+- ``GET /weather?destination=...&dates=...``: the forecast for a trip
+- ``GET /health``: readiness and cache, LLM and token counters
+- ``GET /metrics``: stage latency histograms and counters in the Prometheus text format
+"""
+from contextlib import asynccontextmanager
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+from urllib.parse import quote
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from agentic import metrics
+from agentic.interface import TravelRequest
+from agentic.inventory import get_inventory
+from agentic.tips import get_tips_index
+from agentic.weather import get_climatology, get_forecast
+from agentic.workflow import travel_recommendation
+import langchain_integration
+from langchain_integration import (PLAN_DETAIL, format_selections, generate_travel_plan, stream_travel_plan,
+                                   usage_stats, warm_up)
+from pdf_export import submit_pdf
+from prompt_builder import DETAIL_LEVELS
+from resilience import Metrics
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for msgpack bodies and responses
+    msgpack = None
+
+logger = logging.getLogger("api")
+
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", 50))  # Most requests accepted by one /batch call
+
+MSGPACK = "application/msgpack"
+
+class BadRequest(Exception):
+    """The request body or parameters are invalid; answered with a 400."""
+
+class InFlight:
+    """Runs one computation per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        self._tasks = {}
+
+    async def run(self, key, factory):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.metrics.incr("deduplicated")
+        # A client that disconnects must not cancel the computation for the others
+        return await asyncio.shield(task)
+
+api_metrics = Metrics()
+in_flight = InFlight(api_metrics)
+
+async def _body(request: Request) -> dict:
+    raw = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(MSGPACK):
+            if msgpack is None:
+                raise BadRequest("msgpack bodies are not supported by this server")
+            data = msgpack.unpackb(raw)
+        else:
+            data = json.loads(raw)
+    except ValueError as e:
+        raise BadRequest(f"invalid request body: {e}")
+    if not isinstance(data, dict):
+        raise BadRequest("the request body must be an object")
+    return data
+
+def _travel_request(data) -> TravelRequest:
+    try:
+        return TravelRequest.from_dict(data)
+    except (ValueError, KeyError, TypeError) as e:
+        raise BadRequest(f"invalid travel request: {e}")
+
+def _detail(value) -> str:
+    detail = value or PLAN_DETAIL
+    if detail not in DETAIL_LEVELS:
+        raise BadRequest(f"detail must be one of {', '.join(DETAIL_LEVELS)}")
+    return detail
+
+def _respond(request: Request, data, status_code: int = 200) -> Response:
+    if msgpack is not None and MSGPACK in request.headers.get("accept", ""):
+        return Response(msgpack.packb(data), status_code=status_code, media_type=MSGPACK)
+    return JSONResponse(data, status_code=status_code)
+
+def _plan_for(recommendation, detail):
+    """Generate the plan for a recommendation's request around its itinerary (blocking)."""
+    request = recommendation.request
+    return generate_travel_plan(request.destination, request.dates, request.budget,
+                                format_selections(recommendation.itinerary), detail=detail)
+
+async def recommend(travel_request: TravelRequest, plan: bool = False, detail: str = PLAN_DETAIL):
+    """Return the recommendation for a request, with its travel plan if ``plan``."""
+    async def compute():
+        recommendation = await travel_recommendation(travel_request)
+        travel_plan = await run_in_threadpool(_plan_for, recommendation, detail) if plan else ""
+        return dataclasses.replace(recommendation, travel_plan=travel_plan)
+    return await in_flight.run(("recommendation", travel_request, plan, detail), compute)
+
+def _recommendation_dict(recommendation) -> dict:
+    return {**recommendation.to_dict(), "total_cost": recommendation.get_total_cost()}
+
+async def recommendation_endpoint(request: Request):
+    data = await _body(request)
+    recommendation = await recommend(_travel_request(data), bool(data.get("plan")), _detail(data.get("detail")))
+    return _respond(request, _recommendation_dict(recommendation))
+
+async def plan_endpoint(request: Request):
+    data = await _body(request)
+    travel_request = _travel_request(data)
+    detail = _detail(data.get("detail"))
+    if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+        recommendation = await recommend(travel_request)
+        chunks = stream_travel_plan(travel_request.destination, travel_request.dates, travel_request.budget,
+                                    format_selections(recommendation.itinerary), detail=detail)
+        return StreamingResponse(chunks, media_type="text/markdown; charset=utf-8")
+    recommendation = await recommend(travel_request, plan=True, detail=detail)
+    return _respond(request, {"travel_plan": recommendation.travel_plan})
+
+async def pdf_endpoint(request: Request):
+    data = await _body(request)
+    travel_request = _travel_request(data)
+    recommendation = await recommend(travel_request, plan=True, detail=_detail(data.get("detail")))
+    itinerary = recommendation.itinerary
+    pdf = await asyncio.wrap_future(submit_pdf(
+        recommendation.travel_plan, travel_request.destination, travel_request.dates, travel_request.budget,
+        recommendation.hotels, recommendation.flights, recommendation.activities,
+        costs=itinerary.breakdown if itinerary else None,
+    ))
+    filename = quote(f"{travel_request.destination}_travel_plan.pdf")
+    return Response(pdf, media_type="application/pdf",
+                    headers={"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"})
+
+async def batch_endpoint(request: Request):
+    data = await _body(request)
+    items = data.get("requests")
+    if not isinstance(items, list) or not items:
+        raise BadRequest("requests must be a non-empty list of travel requests")
+    if len(items) > API_MAX_BATCH:
+        raise BadRequest(f"at most {API_MAX_BATCH} requests per batch")
+    plan = bool(data.get("plan"))
+    detail = _detail(data.get("detail"))
+
+    async def one(item):
+        try:
+            return _recommendation_dict(await recommend(_travel_request(item), plan, detail))
+        except BadRequest as e:
+            return {"error": str(e)}
+
+    api_metrics.incr("batch_requests", len(items))
+    return _respond(request, {"results": await asyncio.gather(*(one(item) for item in items))})
+
+async def weather_endpoint(request: Request):
+    destination = request.query_params.get("destination", "").strip()
+    dates = request.query_params.get("dates", "").strip()
+    if not destination or not dates:
+        raise BadRequest("destination and dates are required")
+    forecast = get_forecast(destination, dates)
+    return _respond(request, {
+        "days": forecast.days,
+        "summary": forecast.summary,
+        "climate_records": get_climatology().has_city(destination),
+    })
+
+async def health_endpoint(request: Request):
+    cache = langchain_integration.plan_cache
+    return _respond(request, {
+        "status": "ok",
+        "llm_ready": langchain_integration.get_llm() is not None,
+        "plan_cache": cache.stats() if cache is not None and hasattr(cache, "stats") else None,
+        "llm": langchain_integration.llm_guard.stats(),
+        "tokens": usage_stats(),
+        "api": api_metrics.snapshot(),
+    })
+
+async def metrics_endpoint(request: Request):
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def bad_request(request: Request, error: BadRequest):
+    return JSONResponse({"error": str(error)}, status_code=400)
+
+def _warm_up():
+    """Load the shared LLM client, inventory, tips index and climatology before serving."""
+    warm_up()
+    get_inventory()
+    get_tips_index()
+    get_climatology()
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(_warm_up)
+    yield
+
+app = Starlette(
+    routes=[
+        Route("/recommendation", recommendation_endpoint, methods=["POST"]),
+        Route("/plan", plan_endpoint, methods=["POST"]),
+        Route("/pdf", pdf_endpoint, methods=["POST"]),
+        Route("/batch", batch_endpoint, methods=["POST"]),
+        Route("/weather", weather_endpoint, methods=["GET"]),
+        Route("/health", health_endpoint, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+    ],
+    exception_handlers={BadRequest: bad_request},
+    lifespan=lifespan,
+)
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the travel recommendation API.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; each has its own caches unless PLAN_CACHE_PATH is shared")
+    parser.add_argument("--keep-alive", type=float, default=30,
+                        help="Seconds an idle client connection is kept open for reuse")
+    args = parser.parse_args(argv)
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers,
+                timeout_keep_alive=args.keep_alive)
+
+if __name__ == "__main__":
+    main()
@@ -1,364 +1,285 @@
 import streamlit as st
-import io
+import asyncio
+import logging
 import os
-import re
-import datetime
-from agentic.interface import TravelRequest
-from agentic.workflow import get_flights, get_hotels, get_activities
-from langchain_integration import generate_travel_plan
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
-
-def create_pdf(content, destination, dates, budget, hotels, flights, activities):
-
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=72)
-
-    # Create styles
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        name='CustomTitle',
-        parent=styles['Title'],
-        fontSize=24,
-        alignment=TA_CENTER,
-        spaceAfter=24
-    )
-
-    heading1_style = ParagraphStyle(
-        name='Heading1',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceBefore=16,
-        spaceAfter=10,
-        textColor=colors.darkblue
-    )
-
-    heading2_style = ParagraphStyle(
-        name='Heading2',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=12,
-        spaceAfter=8,
-        textColor=colors.navy
-    )
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from agentic.interface import TravelRecommendation, TravelRequest
+from agentic.inventory import get_inventory
+from agentic.metrics import CACHE_HITS, CACHE_MISSES, trace
+from agentic.tips import get_tip_sheet, get_tips_index
+from agentic.weather import WeatherForecast, get_climatology, get_forecast
+from agentic.workflow import travel_recommendation
+from langchain_integration import (PLAN_DETAIL, PLAN_FAILED, PLAN_FALLBACK_NOTE, PLAN_UNAVAILABLE, format_selections,
+                                   stream_travel_plan, warm_up)
+from prompt_builder import DETAIL_LEVELS
+
+logger = logging.getLogger(__name__)
+
+WEATHER_DAYS_PER_ROW = 7
+TIMING_PANEL = os.getenv("TIMING_PANEL", "").strip().lower() in ("1", "true", "yes")  # Show stage timings per request
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 64))  # Finished trips kept for reuse by every session
+TRIP_STATE = "trip"  # Session state entry holding the last trip generated in the session
+PDF_STATE = "trip_pdf"  # Session state entry holding (trip key, future of the PDF bytes) once a PDF is asked for
+
+def render_tip_category(category):
+    """Render one tip sheet category: its heading, tip columns, phrases and note."""
+    st.markdown(f"### {category['title']}")
+
+    columns = category.get("columns", [])
+    for col, blocks in zip(st.columns(len(columns)) if len(columns) > 1 else [st.container()], columns):
+        with col:
+            st.markdown("\n\n".join(
+                (f"**{block['heading']}:**\n" if block.get("heading") else "")
+                + "\n".join(f"- {item}" for item in block["items"])
+                for block in blocks
+            ))
+
+    # Display phrases in a nice format
+    for phrase, translation in category.get("phrases", []):
+        st.markdown(f"**{phrase}:** {translation}")
+
+    note = category.get("note")
+    if note:
+        getattr(st, note.get("level", "info"))(note["text"])
+
+def _warm_up():
+    """Load what the first request needs: the LLM client (and its SDK), data files and the PDF renderer."""
+    started = time.perf_counter()
+    try:
+        warm_up()
+        get_inventory()
+        get_tips_index()  # Only the index; tip sheets load on demand
+        get_climatology()
+        import pdf_export  # ReportLab
+        pdf_export.get_styles()
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}")
+        return
+    logger.info(f"Warm-up done in {time.perf_counter() - started:.2f}s")
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """Warm up in the background, once per process, so the first page is not held up by it."""
+    thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+class TripResult(NamedTuple):
+    """Everything the results page shows for one request, so a rerun only has to render it."""
+    key: Tuple  # The exact request and plan detail
+    recommendation: TravelRecommendation
+    plan: str
+    forecast: WeatherForecast
+    tip_sheet: Optional[Dict]
+    failed: bool  # Some results are missing or the plan is a fallback, so other sessions should not reuse it
+
+class ResultCache:
+    """Finished trips shared by every session, least recently used first out."""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[TripResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                CACHE_MISSES.incr("result")
+                return None
+            self._entries.move_to_end(key)
+        CACHE_HITS.incr("result")
+        return result
+
+    def set(self, key, result: TripResult):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> ResultCache:
+    return ResultCache()
+
+def _is_fallback(plan: str) -> bool:
+    return plan == PLAN_UNAVAILABLE or plan.endswith(PLAN_FAILED) or plan.startswith(PLAN_FALLBACK_NOTE)
+
+def render_recommendation(request, recommendation):
+    """Render the flight, stay and activity options and the best trip within the budget."""
+    destination, budget = request.destination, request.budget
+    st.success("🎉 Your travel plan is ready!")
+    for source, error in recommendation.errors.items():
+        st.warning(f"⚠️ Some {source.replace('_', ' ')} results are unavailable ({error}).")
+    st.markdown("---")
 
-    heading3_style = ParagraphStyle(
-        name='Heading3',
-        parent=styles['Heading3'],
-        fontSize=12,
-        spaceBefore=10,
-        spaceAfter=6,
-        textColor=colors.darkblue
-    )
+    # Display recommendations with enhanced visuals
+    st.subheader("✈️ Flight Options")
+    st.caption("Best flight options based on price and convenience")
+    if not recommendation.flights:
+        st.info(f"No flights to {destination} match your budget in our inventory yet.")
+    for flight in recommendation.flights:
+        st.write(f"**{flight.airline}**: ${flight.price} "
+                 f"(🛫 Departure: {flight.departure}, 🛬 Arrival: {flight.arrival})")
 
-    normal_style = ParagraphStyle(
-        name='CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        spaceBefore=4,
-        spaceAfter=4,
-        alignment=TA_JUSTIFY
-    )
+    st.markdown("---")
+    st.subheader("🏨 Accommodation Options")
+    st.caption("Places to stay that match your preferences")
+    if not recommendation.hotels:
+        st.info(f"No accommodation in {destination} matches your budget in our inventory yet.")
+    for hotel in recommendation.hotels:
+        st.write(f"**{hotel.name}**: 💵 ${hotel.price} per night (⭐ Rating: {hotel.rating}/5)")
 
-    bullet_style = ParagraphStyle(
-        name='CustomBullet',
-        parent=styles['Normal'],
-        fontSize=10,
-        spaceBefore=2,
-        spaceAfter=2,
-        leftIndent=20,
-        bulletIndent=10
-    )
+    st.markdown("---")
+    st.subheader("🎭 Recommended Activities")
+    st.caption("Exciting things to do at your destination")
+    if not recommendation.activities:
+        st.info(f"No activities in {destination} match your budget in our inventory yet.")
+    for activity in recommendation.activities:
+        st.write(f"**{activity.name}**: 💵 ${activity.price} (⏱️ {activity.duration})")
 
-    italic_style = ParagraphStyle(
-        name='CustomItalic',
-        parent=styles['Italic'],
-        fontSize=10,
-        alignment=TA_CENTER
-    )
+    st.markdown("---")
+    st.subheader("🧮 Best Trip Within Your Budget")
+    st.caption("The combination of options above that makes the most of your budget")
+    itinerary = recommendation.itinerary
+    if itinerary is None:
+        st.info(f"No combination of a flight and a stay fits a ${budget:,} budget. Try raising it.")
+    else:
+        costs = itinerary.breakdown
+        people = f"{costs.travelers} traveler{'s' if costs.travelers != 1 else ''}"
+        if itinerary.flight:
+            st.write(f"✈️ **{itinerary.flight.airline}** round trip for {people}: ${costs.flights:,.0f}")
+        if itinerary.hotel:
+            st.write(f"🏨 **{itinerary.hotel.name}** for {costs.nights} nights: ${costs.hotel:,.0f}")
+        for activity in itinerary.activities:
+            st.write(f"🎭 **{activity.name}** for {people}: ${activity.price * costs.travelers:,.0f}")
+        st.write(f"**Total: ${costs.total:,.0f}** of your ${budget:,} budget "
+                 f"(${costs.per_person:,.0f} per person, ${costs.per_night:,.0f} per night)")
 
-    footer_style = ParagraphStyle(
-        name='Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.darkblue,
-        alignment=TA_CENTER
-    )
+    st.markdown("---")
+    st.subheader("📋 Your Personalized Itinerary")
+    st.info("🤖 AI-Generated Travel Plan")
 
-    # Build document
-    elements = []
+def render_extras(request, result: TripResult):
+    """Render the weather forecast, local tips and the PDF download."""
+    destination, dates = request.destination, request.dates
 
-    # Logo and header
-    # Check if logo exists, if not, create a text-based header
-    logo_path = 'smart-travel.png'  # Update with the actual path to your logo
-    if os.path.exists(logo_path):
-        # Add logo with proper sizing
-        elements.append(Image(logo_path, width=2*inch, height=0.75*inch))
+    # Weather forecast
+    st.markdown("---")
+    st.subheader("☀️ Weather Forecast")
+    st.caption(f"Expected weather in {destination} during your stay ({dates})")
+
+    weather_data = result.forecast.days
+
+    # Display weather data in a nice format, a week per row
+    for week in range(0, len(weather_data), WEATHER_DAYS_PER_ROW):
+        cols = st.columns(WEATHER_DAYS_PER_ROW if len(weather_data) > WEATHER_DAYS_PER_ROW else len(weather_data))
+        for i, day in enumerate(weather_data[week:week + WEATHER_DAYS_PER_ROW]):
+            with cols[i]:
+                st.markdown(f"**{day['date']}**")
+                st.markdown(f"<h1 style='text-align: center; font-size: 40px;'>{day['icon']}</h1>", unsafe_allow_html=True)
+                st.markdown(f"<p style='text-align: center; font-weight: bold;'>{day['temp']}</p>", unsafe_allow_html=True)
+                st.markdown(f"<p style='text-align: center;'>{day['condition']}</p>", unsafe_allow_html=True)
+                st.markdown(f"<p style='text-align: center;'>Rain: {day['precipitation']}</p>", unsafe_allow_html=True)
+
+    # Weather summary
+    summary = result.forecast.summary
+    rainy_days = summary['rainy_days']
+
+    st.markdown(f"""
+    **Weather Summary:**
+    - Average High: {summary['avg_high']:.1f}°C
+    - Average Low: {summary['avg_low']:.1f}°C
+    - Expected Rainy Days: {rainy_days}
+    - Overall: {'Mostly sunny with occasional showers' if rainy_days <= 0.4 * len(weather_data) else 'Mixed conditions with several rainy periods'}
+    """)
+
+    st.caption("Note: Weather forecast is based on historical averages and may vary. Check closer to your travel date for more accurate predictions.")
+    if not get_climatology().has_city(destination):
+        st.caption(f"We don't have climate records for {destination} yet, so typical temperate-climate averages are shown.")
+
+    # Local tips
+    st.markdown("---")
+    st.subheader("💡 Local Tips")
+    st.caption("Insider advice to enhance your trip")
+
+    # Render the destination's tip sheet from the tips knowledge base
+    if result.tip_sheet:
+        categories = result.tip_sheet["categories"]
+        tip_tabs = st.tabs([category["tab"] for category in categories])
+        for tab, category in zip(tip_tabs, categories):
+            with tab:
+                render_tip_category(category)
     else:
-        # Text-based logo as fallback
-        elements.append(Paragraph("<b>SMART TRAVEL</b>",
-                                 ParagraphStyle(name='LogoText',
-                                              parent=styles['Title'],
-                                              fontSize=20,
-                                              alignment=TA_CENTER,
-                                              textColor=colors.darkblue)))
-
-    elements.append(Spacer(1, 0.25*inch))
-
-    # Title
-    elements.append(Paragraph(f"Travel Itinerary", title_style))
-    elements.append(Spacer(1, 0.25*inch))
-
-    # Add current date and time
-    current_datetime = datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
-    datetime_style = ParagraphStyle(
-    name='DateTime',
-    parent=styles['Normal'],
-    fontSize=9,
-    textColor=colors.darkblue,
-    alignment=TA_RIGHT
+        # Generic tips for other destinations
+        st.info(f"Local tips for {destination} would appear here. Our travel experts are constantly updating our database with insider knowledge for destinations worldwide.")
+        for category in get_tips_index().general()["categories"]:
+            render_tip_category(category)
+
+    render_download(request, result)
+
+def render_download(request, result: TripResult):
+    """Offer the PDF, rendering it in the background only once the user asks for it."""
+    pending = st.session_state.get(PDF_STATE)
+    if pending is not None and pending[0] != result.key:
+        pending = None
+    failed = pending is not None and pending[1].done() and pending[1].exception() is not None
+    if (pending is None or failed) and st.button("📄 Create PDF"):
+        from pdf_export import submit_pdf  # Loaded by the warm-up unless it is still running
+
+        recommendation = result.recommendation
+        itinerary = recommendation.itinerary
+        pending = st.session_state[PDF_STATE] = (result.key, submit_pdf(
+            result.plan, request.destination, request.dates, request.budget, recommendation.hotels,
+            recommendation.flights, recommendation.activities, costs=itinerary.breakdown if itinerary else None))
+    if pending is None:
+        return
+
+    try:
+        with st.spinner("📄 Creating your PDF..."):
+            pdf = pending[1].result()
+    except Exception as e:
+        logger.error(f"Error creating the PDF for {request.destination}: {str(e)}")
+        st.error("⚠️ We couldn't create the PDF of your plan. Please try again.")
+        return
+
+    # Download option
+    st.download_button(
+        label="📥 Download Travel Plan as PDF",
+        data=pdf,
+        file_name=f"{request.destination}_travel_plan.pdf",
+        mime="application/pdf"
     )
-    elements.append(Paragraph(f"Generated on: {current_datetime}", datetime_style))
-    elements.append(Spacer(1, 0.1*inch))
-
-    # Trip summary table with better styling
-    trip_info = [
-        ['Destination:', destination],
-        ['Travel Dates:', dates],
-        ['Budget:', f"${budget}"]
-    ]
-
-    trip_table = Table(trip_info, colWidths=[1.5*inch, 4*inch])
-    trip_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightsteelblue),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-    ]))
-    elements.append(trip_table)
-    elements.append(Spacer(1, 0.5*inch))
-
-    # Process the travel plan content to properly format sections
-    # This is the key improvement - parsing the content to create proper sections
-
-    # First, let's clean up the content by ensuring proper line breaks
-    content = content.replace('# ', '\n# ').replace('## ', '\n## ').replace('* ', '\n* ')
-
-    # Split the content by sections
-    sections = re.split(r'(# [^\n]+)', content)
-
-    if len(sections) > 1:  # If we have proper sections
-        # The first element might be empty or introductory text
-        if sections[0].strip():
-            elements.append(Paragraph(sections[0].strip(), normal_style))
-            elements.append(Spacer(1, 0.2*inch))
-
-        # Process each section
-        for i in range(1, len(sections), 2):
-            if i < len(sections):
-                # Section title
-                section_title = sections[i].replace('# ', '').strip()
-                elements.append(Paragraph(section_title, heading1_style))
-
-                # Section content
-                if i+1 < len(sections):
-                    section_content = sections[i+1]
-
-                    # Process subsections
-                    subsections = re.split(r'(## [^\n]+)', section_content)
-
-                    if len(subsections) > 1:  # If we have subsections
-                        # The first element might be content before any subsection
-                        if subsections[0].strip():
-                            # Process bullet points
-                            bullets = subsections[0].split('\n* ')
-                            if len(bullets) > 1:
-                                elements.append(Paragraph(bullets[0].strip(), normal_style))
-                                for bullet in bullets[1:]:
-                                    if bullet.strip():
-                                        elements.append(Paragraph(f"• {bullet.strip()}", bullet_style))
-                            else:
-                                elements.append(Paragraph(subsections[0].strip(), normal_style))
-
-                        # Process each subsection
-                        for j in range(1, len(subsections), 2):
-                            if j < len(subsections):
-                                # Subsection title
-                                subsection_title = subsections[j].replace('## ', '').strip()
-                                elements.append(Paragraph(subsection_title, heading2_style))
-
-                                # Subsection content
-                                if j+1 < len(subsections):
-                                    # Process bullet points
-                                    bullets = subsections[j+1].split('\n* ')
-                                    if len(bullets) > 1:
-                                        elements.append(Paragraph(bullets[0].strip(), normal_style))
-                                        for bullet in bullets[1:]:
-                                            if bullet.strip():
-                                                elements.append(Paragraph(f"• {bullet.strip()}", bullet_style))
-                                    else:
-                                        elements.append(Paragraph(subsections[j+1].strip(), normal_style))
-                    else:
-                        # No subsections, just process the content
-                        # Process bullet points
-                        bullets = section_content.split('\n* ')
-                        if len(bullets) > 1:
-                            elements.append(Paragraph(bullets[0].strip(), normal_style))
-                            for bullet in bullets[1:]:
-                                if bullet.strip():
-                                    elements.append(Paragraph(f"• {bullet.strip()}", bullet_style))
-                        else:
-                            elements.append(Paragraph(section_content.strip(), normal_style))
-    else:
-        # No sections found, just add the content as is
-        elements.append(Paragraph(content, normal_style))
-
-    # Add a page break before recommendations
-    elements.append(PageBreak())
-
-    # Flight information with improved styling
-    elements.append(Paragraph("Flight Options", heading1_style))
-    elements.append(Spacer(1, 0.1*inch))
-
-    flight_data = [['Airline', 'Price', 'Departure', 'Arrival']]
-    for flight in flights[:3]:  # Show top 3 flights
-        flight_data.append([
-            flight['airline'],
-            f"${flight['price']}",
-            flight['departure'],
-            flight['arrival']
-        ])
-
-    flight_table = Table(flight_data, colWidths=[1.25*inch, 1*inch, 1.5*inch, 1.5*inch])
-    flight_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-    ]))
-    elements.append(flight_table)
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Hotel information with improved styling
-    elements.append(Paragraph("Accommodation Options", heading1_style))
-    elements.append(Spacer(1, 0.1*inch))
-
-    hotel_data = [['Hotel', 'Price per Night', 'Rating']]
-    for hotel in hotels[:3]:  # Show top 3 hotels
-        hotel_data.append([
-            hotel['name'],
-            f"${hotel['price']}",
-            f"{hotel['rating']}⭐"
-        ])
-
-    hotel_table = Table(hotel_data, colWidths=[2.5*inch, 1.5*inch, 1*inch])
-    hotel_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-    ]))
-    elements.append(hotel_table)
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Activities with improved styling
-    elements.append(Paragraph("Recommended Activities", heading1_style))
-    elements.append(Spacer(1, 0.1*inch))
-
-    activity_data = [['Activity', 'Price', 'Duration']]
-    for activity in activities[:5]:  # Show top 5 activities
-        activity_data.append([
-            activity['name'],
-            f"${activity['price']}",
-            activity['duration']
-        ])
-
-    activity_table = Table(activity_data, colWidths=[3*inch, 1*inch, 1*inch])
-    activity_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-    ]))
-    elements.append(activity_table)
-    elements.append(Spacer(1, 0.5*inch))
-
-    # Enhanced footer with contact information
-    elements.append(Paragraph("Thank you for using our Smart Travel Planner!", italic_style))
-    elements.append(Spacer(1, 0.1*inch))
-
-    # Contact information in footer
-    elements.append(Paragraph(
-        f"Contact us: <b>Email:</b> office@smart-travel.com | <b>Phone:</b> +39 3121144778",
-        footer_style
-    ))
-
-    # Build PDF with custom page template for header/footer
-    class FooterCanvas:
-        def __init__(self, canvas, doc):
-            self.canvas = canvas
-            self.doc = doc
-            self.width = letter[0]
-            self.height = letter[1]
-
-        def __call__(self, canvas, doc):
-            # Save state
-            canvas.saveState()
-
-            # Add a horizontal line above footer
-            canvas.setStrokeColor(colors.lightgrey)
-            canvas.setLineWidth(0.5)
-            canvas.line(72, 60, self.width - 72, 60)
-
-            # Add footer text
-            canvas.setFont('Helvetica', 8)
-            canvas.setFillColor(colors.darkblue)
-
-            # Company name and copyright
-            canvas.drawCentredString(self.width/2, 45, "Smart Travel - Your Journey, Our Expertise")
-            canvas.drawCentredString(self.width/2, 30, "Email: office@smart-travel.com | Phone: +39 3121144778")
-
-            # Add page number
-            page_num = canvas.getPageNumber()
-            canvas.drawRightString(self.width - 72, 30, f"Page {page_num}")
-
-            # Restore state
-            canvas.restoreState()
-
-    # Build PDF with custom footer
-    doc.build(elements, onFirstPage=FooterCanvas(None, None), onLaterPages=FooterCanvas(None, None))
-    buffer.seek(0)
-    return buffer
+
+def generate_trip(request, detail, key) -> TripResult:
+    """Compute a request's results, rendering each part as soon as it is ready."""
+    destination, dates, budget = request.destination, request.dates, request.budget
+    with st.spinner("✨ Creating your personalized travel experience..."):
+        # Get flight, hotel and activity recommendations concurrently
+        recommendation = asyncio.run(travel_recommendation(request))
+    render_recommendation(request, recommendation)
+
+    # Render the plan as it streams in
+    travel_plan = st.write_stream(stream_travel_plan(destination, dates, budget,
+                                                     format_selections(recommendation.itinerary), detail=detail))
+
+    # Build the forecast from climate normals for the destination and dates
+    result = TripResult(key, recommendation, travel_plan, get_forecast(destination, dates),
+                        get_tip_sheet(destination),
+                        failed=bool(recommendation.errors) or _is_fallback(travel_plan))
+    render_extras(request, result)
+    return result
+
+def render_trip(request, result: TripResult):
+    """Render a trip generated earlier, without calling the providers or the LLM."""
+    render_recommendation(request, result.recommendation)
+    st.markdown(result.plan)
+    render_extras(request, result)
 
 def main():
     st.set_page_config(page_title="Travel Recommendation System", layout="wide")
@@ -389,318 +310,54 @@ def main():
                                    ["Balanced", "Luxury", "Budget", "Adventure", "Cultural", "Relaxation"])
         accommodation_type = st.selectbox("🏠 Accommodation Preference",
                                         ["Hotel", "Resort", "Apartment", "Hostel", "Boutique"])
+        detail = st.selectbox("📝 Plan Detail", DETAIL_LEVELS,
+                              index=DETAIL_LEVELS.index(PLAN_DETAIL) if PLAN_DETAIL in DETAIL_LEVELS else 1,
+                              format_func=str.capitalize)
     with col2:
-        travelers = st.number_input("👨‍👩‍👧‍👦 Number of Travelers", min_value=1, value=10)
+        travelers = st.number_input("👨‍👩‍👧‍👦 Number of Travelers", min_value=1, value=2)
         interests = st.multiselect("🎯 Interests",
                                   ["History", "Food", "Nature", "Shopping", "Art", "Nightlife", "Sports"])
 
-    if st.button("🚀 Generate My Travel Plan"):
-        with st.spinner("✨ Creating your personalized travel experience..."):
-            # Create a travel request
-            request = TravelRequest(destination, dates, budget)
-
-            # Get recommendations using the agentic workflow
-            flights = get_flights(request)
-            hotels = get_hotels(request)
-            activities = get_activities(request)
-
-            # Generate a travel plan using LangChain
-            travel_plan = generate_travel_plan(destination, dates, budget)
-
-            st.success("🎉 Your travel plan is ready!")
-            st.markdown("---")
-
-            # Display recommendations with enhanced visuals
-            st.subheader("✈️ Flight Options")
-            st.caption("Best flight options based on price and convenience")
-            for flight in flights:
-                st.write(f"**{flight['airline']}**: ${flight['price']} "
-                         f"(🛫 Departure: {flight['departure']}, 🛬 Arrival: {flight['arrival']})")
-
-            st.markdown("---")
-            st.subheader("🏨 Accommodation Options")
-            st.caption("Places to stay that match your preferences")
-            for hotel in hotels:
-                st.write(f"**{hotel['name']}**: 💵 ${hotel['price']} per night (⭐ Rating: {hotel['rating']}/5)")
-
-            st.markdown("---")
-            st.subheader("🎭 Recommended Activities")
-            st.caption("Exciting things to do at your destination")
-            for activity in activities:
-                st.write(f"**{activity['name']}**: 💵 ${activity['price']} (⏱️ {activity['duration']})")
-
-            st.markdown("---")
-            st.subheader("📋 Your Personalized Itinerary")
-            st.info("🤖 AI-Generated Travel Plan")
-            st.write(travel_plan)
-
-            # Weather forecast
-            st.markdown("---")
-            st.subheader("☀️ Weather Forecast")
-            st.caption(f"Expected weather in {destination} during your stay ({dates})")
-
-            # Create weather forecast data for the dates
-            weather_data = []
-            if "may" in dates.lower():
-                # Paris in May weather data (historical averages)
-                weather_icons = ["🌤️", "🌦️", "☀️", "🌤️", "☀️"]
-                temperatures = ["19°C/10°C", "18°C/11°C", "21°C/12°C", "20°C/11°C", "22°C/13°C"]
-                conditions = ["Partly Cloudy", "Light Showers", "Sunny", "Partly Cloudy", "Sunny"]
-                precipitation = ["10%", "30%", "5%", "15%", "5%"]
-            
-                # Extract the date range from the input
-                date_parts = dates.split("-")
-                if len(date_parts) >= 2:
-                    try:
-                        start_day = int(date_parts[0].split(" ")[-1])
-                        end_day = int(date_parts[1].split(" ")[0])
-                        month = date_parts[0].split(" ")[0]
-                        year = date_parts[1].split(" ")[-1]
-            
-                        # Create a row for each day in the range
-                        for i, day in enumerate(range(start_day, end_day + 1)):
-                            if i < len(weather_icons):
-                                weather_data.append({
-                                    "date": f"{month} {day}, {year}",
-                                    "icon": weather_icons[i],
-                                    "temp": temperatures[i],
-                                    "condition": conditions[i],
-                                    "precipitation": precipitation[i]
-                                })
-                    except (ValueError, IndexError):
-                        # Fallback if date parsing fails
-                        weather_data = [
-                            {"date": "May 5, 2025", "icon": "🌤️", "temp": "19°C/10°C", "condition": "Partly Cloudy", "precipitation": "10%"},
-                            {"date": "May 6, 2025", "icon": "🌦️", "temp": "18°C/11°C", "condition": "Light Showers", "precipitation": "30%"},
-                            {"date": "May 7, 2025", "icon": "☀️", "temp": "21°C/12°C", "condition": "Sunny", "precipitation": "5%"},
-                            {"date": "May 8, 2025", "icon": "🌤️", "temp": "20°C/11°C", "condition": "Partly Cloudy", "precipitation": "15%"},
-                            {"date": "May 9, 2025", "icon": "☀️", "temp": "22°C/13°C", "condition": "Sunny", "precipitation": "5%"}
-                        ]
-            else:
-                # Generic weather data if not May
-                weather_data = [
-                    {"date": "Day 1", "icon": "🌤️", "temp": "19°C/10°C", "condition": "Partly Cloudy", "precipitation": "10%"},
-                    {"date": "Day 2", "icon": "🌦️", "temp": "18°C/11°C", "condition": "Light Showers", "precipitation": "30%"},
-                    {"date": "Day 3", "icon": "☀️", "temp": "21°C/12°C", "condition": "Sunny", "precipitation": "5%"},
-                    {"date": "Day 4", "icon": "🌤️", "temp": "20°C/11°C", "condition": "Partly Cloudy", "precipitation": "15%"},
-                    {"date": "Day 5", "icon": "☀️", "temp": "22°C/13°C", "condition": "Sunny", "precipitation": "5%"}
-                ]
-            
-            # Display weather data in a nice format
-            cols = st.columns(len(weather_data))
-            for i, day in enumerate(weather_data):
-                with cols[i]:
-                    st.markdown(f"**{day['date']}**")
-                    st.markdown(f"<h1 style='text-align: center; font-size: 40px;'>{day['icon']}</h1>", unsafe_allow_html=True)
-                    st.markdown(f"<p style='text-align: center; font-weight: bold;'>{day['temp']}</p>", unsafe_allow_html=True)
-                    st.markdown(f"<p style='text-align: center;'>{day['condition']}</p>", unsafe_allow_html=True)
-                    st.markdown(f"<p style='text-align: center;'>Rain: {day['precipitation']}</p>", unsafe_allow_html=True)
-            
-            # Weather summary
-            avg_high = sum([int(day['temp'].split('/')[0].replace('°C', '')) for day in weather_data]) / len(weather_data)
-            avg_low = sum([int(day['temp'].split('/')[1].replace('°C', '')) for day in weather_data]) / len(weather_data)
-            rainy_days = sum(1 for day in weather_data if int(day['precipitation'].replace('%', '')) > 20)
-            
-            st.markdown(f"""
-            **Weather Summary:**
-            - Average High: {avg_high:.1f}°C
-            - Average Low: {avg_low:.1f}°C
-            - Rainy Days: {rainy_days}
-            - Overall: {'Mostly sunny with occasional showers' if rainy_days <= 2 else 'Mixed conditions with several rainy periods'}
-            """)
-            
-            st.caption("Note: Weather forecast is based on historical averages and may vary. Check closer to your travel date for more accurate predictions.")
-            
-            # Local tips
-            st.markdown("---")
-            st.subheader("💡 Local Tips")
-            st.caption("Insider advice to enhance your trip")
-            
-            # Create local tips based on destination
-            if destination.lower() == "paris":
-                # Create tabs for different categories of tips
-                tip_tabs = st.tabs(["🍽️ Dining", "💰 Money-Saving", "🚇 Transportation", "🗣️ Language", "⚠️ Safety"])
-            
-                with tip_tabs[0]:  # Dining tips
-                    st.markdown("### Dining Like a Local")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("""
-                        **Best Times to Eat:**
-                        - Cafés open early (7-8am)
-                        - Lunch: 12-2pm
-                        - Dinner: 7:30-10pm (restaurants may not open before 7pm)
-            
-                        **Ordering Water:**
-                        - Ask for "une carafe d'eau" for free tap water
-                        - Bottled water is charged extra
-            
-                        **Service & Tipping:**
-                        - "Service compris" means tip is included
-                        - Round up or leave €1-2 for good service
-                        """)
-                    with col2:
-                        st.markdown("""
-                        **Local Specialties to Try:**
-                        - Croissants from award-winning bakeries like Du Pain et des Idées
-                        - Steak frites at Le Relais de l'Entrecôte
-                        - Falafel in Le Marais at L'As du Fallafel
-                        - Macarons from Pierre Hermé or Ladurée
-                        - Wine and cheese plate at any local wine bar
-            
-                        **Etiquette:**
-                        - Always greet with "Bonjour" when entering shops
-                        - Keep bread on the table, not on your plate
-                        """)
-            
-                with tip_tabs[1]:  # Money-saving tips
-                    st.markdown("### Budget-Friendly Paris")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("""
-                        **Free Attractions:**
-                        - Museums on first Sunday of each month
-                        - Père Lachaise Cemetery
-                        - Sacré-Cœur Basilica
-                        - Notre-Dame Cathedral (exterior)
-                        - Jardin du Luxembourg
-            
-                        **Affordable Dining:**
-                        - Eat main meal at lunch with "formule" menu
-                        - Shop at markets like Marché d'Aligre
-                        - Picnic in parks with baguettes, cheese, and wine
-                        """)
-                    with col2:
-                        st.markdown("""
-                        **Transportation Savings:**
-                        - Buy a carnet of 10 metro tickets (cheaper than singles)
-                        - Consider Paris Museum Pass for multiple attractions
-                        - Use Vélib' bike sharing for short trips
-                        - Walk between nearby attractions
-            
-                        **Shopping Tips:**
-                        - Tax refund available for purchases over €100
-                        - Best sales (soldes) in January and July
-                        """)
-            
-                with tip_tabs[2]:  # Transportation tips
-                    st.markdown("### Getting Around Paris")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("""
-                        **Metro Tips:**
-                        - Download RATP app for navigation
-                        - Metro runs 5:30am-1:15am (2:15am weekends)
-                        - Keep ticket until you exit (inspections occur)
-                        - Line 1 connects many major attractions
-            
-                        **Airport Transfers:**
-                        - RER B train: CDG to central Paris (€11.40)
-                        - Orlybus: Orly to Denfert-Rochereau (€9.50)
-                        - Allow 60-90 minutes for airport transfers
-                        """)
-                    with col2:
-                        st.markdown("""
-                        **Walking Routes:**
-                        - Seine riverside paths connect many attractions
-                        - Covered passages (Passage des Panoramas, etc.)
-                        - Canal Saint-Martin for trendy neighborhoods
-            
-                        **Avoiding Crowds:**
-                        - Major attractions open early (8-9am)
-                        - Visit Louvre on Wednesday/Friday evenings
-                        - Eiffel Tower least crowded during dinner hours
-                        - Book tickets online to skip lines
-                        """)
-            
-                with tip_tabs[3]:  # Language tips
-                    st.markdown("### Essential French Phrases")
-                    phrases = {
-                        "Hello": "Bonjour (bon-zhoor)",
-                        "Good evening": "Bonsoir (bon-swahr)",
-                        "Please": "S'il vous plaît (seel voo pleh)",
-                        "Thank you": "Merci (mehr-see)",
-                        "You're welcome": "De rien (duh ree-en)",
-                        "Excuse me": "Excusez-moi (ex-koo-zay mwah)",
-                        "Do you speak English?": "Parlez-vous anglais? (par-lay voo on-glay)",
-                        "I don't understand": "Je ne comprends pas (zhuh nuh kom-pron pah)",
-                        "Where is...?": "Où est...? (oo eh)",
-                        "How much is it?": "C'est combien? (say kom-bee-en)",
-                        "The bill, please": "L'addition, s'il vous plaît (lah-dee-see-ohn seel voo pleh)"
-                    }
-            
-                    # Display phrases in a nice format
-                    for phrase, translation in phrases.items():
-                        st.markdown(f"**{phrase}:** {translation}")
-            
-                    st.info("💡 Tip: Even a simple 'Bonjour' before speaking English is greatly appreciated by locals!")
-            
-                with tip_tabs[4]:  # Safety tips
-                    st.markdown("### Safety & Etiquette")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("""
-                        **Common Scams to Avoid:**
-                        - Petition signers (distraction technique)
-                        - Friendship bracelet offers (especially near Sacré-Cœur)
-                        - "Gold ring" found on the ground
-                        - Forced help with ticket machines
-            
-                        **Pickpocket Awareness:**
-                        - Be vigilant on metro line 1 and at tourist spots
-                        - Front pockets or money belts recommended
-                        - Keep bags zipped and in front of you
-                        """)
-                    with col2:
-                        st.markdown("""
-                        **Emergency Numbers:**
-                        - General Emergency: 112
-                        - Police: 17
-                        - Ambulance: 15
-                        - Fire: 18
-            
-                        **Health & Comfort:**
-                        - Pharmacies marked with green cross signs
-                        - Public toilets (sanisettes) are free
-                        - Drinking water from Wallace fountains is safe
-                        - Dress in layers for changing weather
-                        """)
-            
-                    st.warning("⚠️ Be especially vigilant around the Eiffel Tower, Louvre, and Montmartre areas where pickpockets target tourists.")
-            
-            else:
-                # Generic tips for other destinations
-                st.info(f"Local tips for {destination} would appear here. Our travel experts are constantly updating our database with insider knowledge for destinations worldwide.")
-            
-                # Placeholder for generic tips
-                st.markdown("""
-                ### General Travel Tips:
-            
-                - Research local customs and etiquette before your trip
-                - Learn a few basic phrases in the local language
-                - Keep digital and physical copies of important documents
-                - Notify your bank of travel plans to avoid card blocks
-                - Consider purchasing travel insurance
-                - Stay hydrated and be mindful of jet lag
-                - Use apps like Google Maps to download offline maps
-                """)
-            
-            # Download option
-            pdf_buffer = create_pdf(
-                travel_plan,
-                destination,
-                dates,
-                budget,
-                hotels,
-                flights,
-                activities
-            )
-            st.download_button(
-                label="📥 Download Travel Plan as PDF",
-                data=pdf_buffer,
-                file_name=f"{destination}_travel_plan.pdf",
-                mime="application/pdf"
-            )
+    # The form is on screen now; load the heavy parts while the user fills it in
+    start_warm_up()
+
+    clicked = st.button("🚀 Generate My Travel Plan")
+    try:
+        request = TravelRequest(destination, dates, budget, travel_style, accommodation_type, travelers, interests)
+    except ValueError as e:
+        st.session_state.pop(TRIP_STATE, None)
+        if clicked:
+            st.error(f"⚠️ Please check your trip details: {e}")
+        st.stop()
+    # Keyed by the exact request: the offers, itinerary and PDF depend on every field, the budget included
+    key = (request, detail)
+
+    # Widget interactions rerun this script; a trip already generated for this form is only rendered again,
+    # and forgotten as soon as any form value changes
+    result = st.session_state.get(TRIP_STATE)
+    if result is not None and (result.key != key or clicked and result.failed):
+        del st.session_state[TRIP_STATE]
+        result = None  # Another trip, or asked to retry one that was incomplete
+    if not clicked and result is None:
+        return
+    if result is None:
+        result = get_result_cache().get(key)
+
+    # Time each stage of this request, for the metrics and the optional timing panel
+    started = time.perf_counter()
+    with trace() as spans:
+        if result is None:
+            result = generate_trip(request, detail, key)
+            if not result.failed:
+                get_result_cache().set(key, result)
+        else:
+            render_trip(request, result)
+        st.session_state[TRIP_STATE] = result
+
+    if TIMING_PANEL and spans:
+        with st.expander("⏱️ Timings"):
+            st.table([{"Stage": stage, "Time (ms)": f"{seconds * 1000:,.1f}"} for stage, seconds in spans]
+                     + [{"Stage": "total", "Time (ms)": f"{(time.perf_counter() - started) * 1000:,.1f}"}])
 
 if __name__ == "__main__":
     main()
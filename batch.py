@@ -0,0 +1,211 @@
+# batch.py
+"""Precompute recommendations and travel plans for a file of requests.
+
+    python batch.py popular.jsonl -o results.jsonl --cache plans.sqlite
+
+Requests are read from JSONL (one TravelRequest dict per line) or CSV (one
+column per TravelRequest field, interests separated by ";"). Plans are written
+to the plan cache, so the app serves them as cache hits, and every item is
+appended to the output file with its timings. Items already completed in the
+output file are skipped, so an interrupted run can simply be restarted.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from agentic.interface import TravelRequest
+from agentic.workflow import travel_recommendation
+import langchain_integration
+from langchain_integration import (PLAN_CACHE_PATH, PLAN_CACHE_TTL, PLAN_FAILED, PLAN_FALLBACK_NOTE,
+                                   PLAN_UNAVAILABLE, build_plan_cache, format_selections, generate_travel_plan,
+                                   plan_cache_key, set_plan_cache)
+
+logger = logging.getLogger("batch")
+
+DEFAULT_WORKERS = 4
+DEFAULT_LLM_RATE = 30.0  # LLM calls per minute
+
+class RateLimiter:
+    """Spaces calls evenly so that at most ``per_minute`` start in any minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def request_id(request: TravelRequest) -> str:
+    return hashlib.sha256(request.to_json().encode("utf-8")).hexdigest()[:16]
+
+def _csv_row(row):
+    data = {name: value.strip() for name, value in row.items() if name and value and value.strip()}
+    if "interests" in data:
+        data["interests"] = [interest for interest in data["interests"].split(";") if interest.strip()]
+    return data
+
+def read_requests(path):
+    """Yield ``(line, request_or_error)`` for each request in a JSONL or CSV file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = ((i + 2, _csv_row(row)) for i, row in enumerate(csv.DictReader(f)))
+        else:
+            rows = ((i + 1, line) for i, line in enumerate(f) if line.strip())
+        for line, row in rows:
+            try:
+                data = row if isinstance(row, dict) else json.loads(row)
+                yield line, TravelRequest.from_dict(data)
+            except (ValueError, KeyError, TypeError) as e:
+                yield line, e
+
+def completed_ids(output_path):
+    """Return the ids of items already completed in an earlier run's output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interrupted run
+            if item.get("status") == "ok":
+                done.add(item["id"])
+    return done
+
+def run_item(line, request, limiter=None):
+    """Build the recommendation and plan for one request and return its output record."""
+    timings = {}
+    start = time.perf_counter()
+    try:
+        recommendation = asyncio.run(travel_recommendation(request))
+        timings["offers"] = time.perf_counter() - start
+
+        # Only calls that will actually reach the LLM wait for the rate limiter
+        selections = format_selections(recommendation.itinerary)
+        cache = langchain_integration.plan_cache
+        key = plan_cache_key(request.destination, request.dates, request.budget, selections)
+        cached = cache is not None and cache.get(key) is not None
+        if not cached and limiter is not None:
+            wait_start = time.perf_counter()
+            limiter.acquire()
+            timings["rate_limit"] = time.perf_counter() - wait_start
+
+        plan_start = time.perf_counter()
+        # Precomputed plans must be generated for their exact request, not adapted from a similar one
+        plan = generate_travel_plan(request.destination, request.dates, request.budget, selections,
+                                    approximate=False)
+        timings["plan"] = time.perf_counter() - plan_start
+        timings["total"] = time.perf_counter() - start
+
+        # Fallback plans (LLM unavailable, failing or rate limited) are never cached
+        failed = plan in (PLAN_UNAVAILABLE, PLAN_FAILED) or plan.startswith(PLAN_FALLBACK_NOTE) or \
+            (cache is not None and cache.get(key) is None)
+        result = recommendation.to_dict()
+        result["travel_plan"] = plan
+        return {
+            "id": request_id(request),
+            "line": line,
+            "status": "failed" if failed else "ok",
+            "cached": cached,
+            "error": plan if failed else None,
+            "source_errors": dict(recommendation.errors),
+            "total_cost": recommendation.get_total_cost(),
+            "timings": timings,
+            "recommendation": result,
+        }
+    except Exception as e:
+        logger.exception(f"Line {line}: {request.destination} failed")
+        timings["total"] = time.perf_counter() - start
+        return {"id": request_id(request), "line": line, "status": "failed", "cached": False,
+                "error": str(e) or type(e).__name__, "timings": timings}
+
+def run_batch(input_path, output_path, workers=DEFAULT_WORKERS, llm_rate=DEFAULT_LLM_RATE, resume=True):
+    """Process every request in ``input_path``, appending results to ``output_path``. Returns the records."""
+    done = completed_ids(output_path) if resume else set()
+    limiter = RateLimiter(llm_rate) if llm_rate else None
+    records = []
+    write_lock = threading.Lock()
+    # Bound the queued items, so huge inputs are streamed rather than loaded up front
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+
+        def write(record):
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                records.append(record)
+                timings = record["timings"]
+                logger.info(f"[{len(records)}] line {record['line']}: {record['status']}"
+                            f"{' (cached)' if record.get('cached') else ''} in {timings['total']:.2f}s"
+                            + (f" (offers {timings['offers']:.2f}s, rate limit {timings.get('rate_limit', 0.0):.2f}s,"
+                               f" plan {timings['plan']:.2f}s)" if "plan" in timings else ""))
+
+        def finished(future):
+            try:
+                write(future.result())
+            finally:
+                slots.release()
+
+        skipped = 0
+        for line, request in read_requests(input_path):
+            if isinstance(request, Exception):
+                write({"id": None, "line": line, "status": "invalid", "error": str(request), "timings": {"total": 0.0}})
+                continue
+            if request_id(request) in done:
+                skipped += 1
+                continue
+            slots.acquire()
+            pool.submit(run_item, line, request, limiter).add_done_callback(finished)
+
+    totals = np.array([record["timings"]["total"] for record in records if record["status"] != "invalid"])
+    counts = {status: sum(record["status"] == status for record in records) for status in ("ok", "failed", "invalid")}
+    logger.info(
+        f"Done: {counts['ok']} ok ({sum(bool(record.get('cached')) for record in records)} from cache), "
+        f"{counts['failed']} failed, {counts['invalid']} invalid, {skipped} skipped as already done"
+        + (f"; per item p50 {np.percentile(totals, 50):.2f}s, p95 {np.percentile(totals, 95):.2f}s"
+           if len(totals) else "")
+    )
+    return records
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute travel recommendations and plans for a request file.")
+    parser.add_argument("input", help="JSONL or CSV file of travel requests")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--cache", default=PLAN_CACHE_PATH,
+                        help="SQLite plan cache file to fill (defaults to PLAN_CACHE_PATH)")
+    parser.add_argument("--ttl", type=float, default=PLAN_CACHE_TTL, help="Seconds the precomputed plans stay valid")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Requests processed concurrently")
+    parser.add_argument("--llm-rate", type=float, default=DEFAULT_LLM_RATE,
+                        help="Maximum LLM calls per minute (0 for no limit)")
+    parser.add_argument("--no-resume", action="store_true", help="Reprocess every request and overwrite the output")
+    args = parser.parse_args(argv)
+
+    if not args.cache:
+        logger.warning("No --cache or PLAN_CACHE_PATH set: plans are only written to the output file")
+    set_plan_cache(build_plan_cache(args.cache, ttl=args.ttl))
+
+    records = run_batch(args.input, args.output, workers=args.workers, llm_rate=args.llm_rate,
+                        resume=not args.no_resume)
+    return 1 if any(record["status"] != "ok" for record in records) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
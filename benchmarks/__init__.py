@@ -0,0 +1 @@
+# Benchmarks for the recommendation pipeline; run with: python -m benchmarks.run
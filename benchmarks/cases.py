@@ -0,0 +1,186 @@
+# benchmarks/cases.py
+"""Benchmark cases: offer lookups on synthetic inventories, PDF export, date parsing and the
+weather forecast, and whole requests answered by the fake LLM."""
+import asyncio
+import functools
+import os
+import subprocess
+import sys
+from typing import List, Sequence
+
+import numpy as np
+
+from agentic import dates as dates_module
+from agentic.interface import TravelRequest
+from agentic.inventory import Inventory, OfferTable, TABLES, set_inventory
+from agentic.ranking import INTEREST_CATEGORIES
+from agentic.weather import get_climatology, get_forecast
+from agentic.workflow import get_activities, get_flights, get_hotels, travel_recommendation
+from benchmarks.harness import Benchmark
+
+SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)  # Rows per synthetic table
+DESTINATION = "Paris"
+DESTINATION_SHARE = 0.1  # Share of each synthetic table at the benchmarked destination
+OTHER_DESTINATIONS = 99
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules timed from a cold interpreter: the app's imports (before its first paint) and the heavy subsystems
+STARTUP_IMPORTS = ("app", "langchain_integration", "pdf_export", "langchain_google_genai")
+
+REQUEST = TravelRequest(DESTINATION, "May 5-9, 2025", 5000, "Balanced", "Hotel", 2, ("Food", "History"))
+LONG_REQUEST = TravelRequest(DESTINATION, "May 1-14, 2025", 12000, "Cultural", "Boutique", 2, ("Art", "Food"))
+
+DATE_SAMPLES = (
+    "May 5-9, 2025", "5-9 May 2025", "May 28 - June 2, 2025", "Dec 28, 2025 to Jan 3, 2026",
+    "2025-05-05 to 2025-05-09", "June 14, 2025", "Sept 1-15 2025", "next week", "Jul 4 - Jul 11",
+    "March 30 - April 2, 2026",
+)
+
+_AIRLINES = np.array([f"Airline {i}" for i in range(40)], dtype=object)
+_TIMES = np.array([f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in (0, 30)], dtype=object)
+_HOTELS = np.array([f"Hotel {i}" for i in range(5000)], dtype=object)
+_HOTEL_TYPES = np.array(["Hotel", "Resort", "Apartment", "Hostel", "Boutique"], dtype=object)
+_ACTIVITIES = np.array([f"Activity {i}" for i in range(2000)], dtype=object)
+_DURATIONS = np.array(["1 hour", "2 hours", "3 hours", "Half day", "Full day"], dtype=object)
+_CATEGORIES = np.array(sorted({c for categories in INTEREST_CATEGORIES.values() for c in categories}
+                              | {"Sightseeing", "Entertainment"}), dtype=object)
+
+def _pick(rng, pool: np.ndarray, size: int) -> np.ndarray:
+    return pool[rng.integers(0, len(pool), size)]
+
+@functools.lru_cache(maxsize=1)
+def synthetic_inventory(size: int, seed: int = 0) -> Inventory:
+    """Build an inventory with ``size`` rows per table; DESTINATION_SHARE of them are at DESTINATION."""
+    rng = np.random.default_rng(seed)
+    destinations = np.array([DESTINATION] + [f"City {i}" for i in range(OTHER_DESTINATIONS)], dtype=object)
+
+    def destination_column():
+        others = rng.integers(1, len(destinations), size)
+        return destinations[np.where(rng.random(size) < DESTINATION_SHARE, 0, others)]
+
+    columns = {
+        "flights": {
+            "destination": destination_column(),
+            "airline": _pick(rng, _AIRLINES, size),
+            "departure": _pick(rng, _TIMES, size),
+            "arrival": _pick(rng, _TIMES, size),
+            "price": rng.uniform(80, 1500, size).round(2),
+        },
+        "hotels": {
+            "destination": destination_column(),
+            "name": _pick(rng, _HOTELS, size),
+            "rating": rng.uniform(6, 10, size).round(1),
+            "price": rng.uniform(40, 900, size).round(2),
+            "type": _pick(rng, _HOTEL_TYPES, size),
+        },
+        "activities": {
+            "destination": destination_column(),
+            "name": _pick(rng, _ACTIVITIES, size),
+            "duration": _pick(rng, _DURATIONS, size),
+            "price": rng.uniform(5, 300, size).round(2),
+            "category": _pick(rng, _CATEGORIES, size),
+        },
+    }
+    return Inventory(**{
+        name: OfferTable(record_type, columns[name], indexed)
+        for name, (record_type, indexed) in TABLES.items()
+    })
+
+def _use_synthetic_inventory(size: int):
+    set_inventory(synthetic_inventory(size))
+
+def offer_benchmarks(sizes: Sequence[int] = SIZES) -> List[Benchmark]:
+    benchmarks = []
+    for size in sizes:
+        setup = functools.partial(_use_synthetic_inventory, size)
+        for kind, lookup in (("flights", get_flights), ("hotels", get_hotels), ("activities", get_activities)):
+            benchmarks.append(Benchmark(f"offers.{kind}[n={size:,}]", functools.partial(lookup, REQUEST), setup))
+    return benchmarks
+
+def _recommendation(request: TravelRequest):
+    set_inventory(None)  # The bundled inventory, not a synthetic one
+    return asyncio.run(travel_recommendation(request))
+
+def _pdf_benchmark(name: str, request: TravelRequest, detail: str) -> Benchmark:
+    from fake_llm import fake_plan
+    from langchain_integration import format_selections
+    import pdf_export
+    from prompt_builder import build_plan_prompt
+
+    state = {}
+
+    def setup():
+        recommendation = _recommendation(request)
+        prompt = build_plan_prompt(request.destination, request.dates, request.budget,
+                                   format_selections(recommendation.itinerary), detail)
+        state["args"] = (fake_plan(prompt.text), request.destination, request.dates, request.budget,
+                         recommendation.hotels, recommendation.flights, recommendation.activities)
+        state["costs"] = recommendation.itinerary.breakdown if recommendation.itinerary else None
+
+    def run():
+        pdf_export._pdf_cache.clear()  # Time the rendering, not the cache
+        return pdf_export.create_pdf(*state["args"], costs=state["costs"])
+
+    return Benchmark(name, run, setup)
+
+def pdf_benchmarks() -> List[Benchmark]:
+    return [
+        _pdf_benchmark("pdf.create[short]", REQUEST, "brief"),
+        _pdf_benchmark("pdf.create[long]", LONG_REQUEST, "detailed"),
+    ]
+
+def _parse_samples():
+    dates_module._parse.cache_clear()  # Time the parser, not its cache
+    return [dates_module.parse_date_range(text) for text in DATE_SAMPLES]
+
+def weather_benchmarks() -> List[Benchmark]:
+    return [
+        Benchmark(f"dates.parse[{len(DATE_SAMPLES)} strings]", _parse_samples),
+        Benchmark("weather.forecast[5 days]", functools.partial(get_forecast, DESTINATION, REQUEST.dates),
+                  get_climatology),
+        Benchmark("weather.forecast[14 days]", functools.partial(get_forecast, DESTINATION, LONG_REQUEST.dates),
+                  get_climatology),
+    ]
+
+def _cold_import(module: str):
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def startup_benchmarks() -> List[Benchmark]:
+    """Wall time of a fresh interpreter importing each module, interpreter start-up included."""
+    return [Benchmark(f"startup.import[{module}]", functools.partial(_cold_import, module),
+                      min_iterations=3, min_time=0.0, trace_memory=False)
+            for module in STARTUP_IMPORTS]
+
+def end_to_end_benchmarks(llm_latency: float = 0.0) -> List[Benchmark]:
+    """Recommendation, plan and PDF for one request, with the fake LLM and no plan or PDF caching."""
+    from fake_llm import FakeTravelLLM
+    import langchain_integration
+    import pdf_export
+    from resilience import Guard
+
+    def setup():
+        set_inventory(None)
+        langchain_integration.register_backend(
+            "benchmark", lambda: FakeTravelLLM(latency=llm_latency, latency_sigma=0.0, tokens_per_second=0))
+        langchain_integration.set_llm_backend("benchmark")
+        langchain_integration.set_plan_cache(None)
+        langchain_integration.set_semantic_cache(None)
+        langchain_integration.set_llm_guard(Guard(retries=0))
+
+    def run(request):
+        recommendation = asyncio.run(travel_recommendation(request))
+        plan = langchain_integration.generate_travel_plan(
+            request.destination, request.dates, request.budget,
+            langchain_integration.format_selections(recommendation.itinerary))
+        pdf_export._pdf_cache.clear()
+        itinerary = recommendation.itinerary
+        return pdf_export.create_pdf(plan, request.destination, request.dates, request.budget,
+                                     recommendation.hotels, recommendation.flights, recommendation.activities,
+                                     costs=itinerary.breakdown if itinerary else None)
+
+    return [
+        Benchmark("e2e.request[5 days]", functools.partial(run, REQUEST), setup),
+        Benchmark("e2e.request[14 days]", functools.partial(run, LONG_REQUEST), setup),
+    ]
@@ -0,0 +1,142 @@
+# benchmarks/harness.py
+"""Timing, memory measurement, history and baseline comparison for the benchmarks."""
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+# Metrics compared against the baseline, and whether a higher value is better
+COMPARED = {"p50_ms": False, "p95_ms": False, "throughput": True, "peak_kb": False}
+DEFAULT_TOLERANCE = 0.2  # Relative change beyond which a metric counts as a regression
+
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[[], object]  # One operation
+    setup: Optional[Callable[[], None]] = None  # Run once before timing, not measured
+    min_iterations: int = 5
+    min_time: float = 0.5  # Seconds of timed iterations, at least
+    warmup: int = 1
+    trace_memory: bool = True  # False for operations that run in another process
+
+def measure(benchmark: Benchmark, time_scale: float = 1.0) -> Dict:
+    """Time a benchmark's operation and measure its peak traced memory.
+
+    Iterations run until both ``min_iterations`` and ``min_time * time_scale``
+    are reached. Peak memory is taken from one extra, separately traced
+    iteration, so tracing does not slow the timed ones.
+    """
+    if benchmark.setup is not None:
+        benchmark.setup()
+    for _ in range(benchmark.warmup):
+        benchmark.run()
+
+    gc.collect()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < benchmark.min_iterations or time.perf_counter() - started < benchmark.min_time * time_scale:
+        call_started = time.perf_counter()
+        benchmark.run()
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    peak = None
+    if benchmark.trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            benchmark.run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "name": benchmark.name,
+        "iterations": len(latencies),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "throughput": len(latencies) / elapsed,  # Operations per second
+        "peak_kb": peak / 1024 if peak is not None else None,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def new_run(results: List[Dict]) -> Dict:
+    """Wrap results with the time, commit and machine they were measured on."""
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "results": results,
+    }
+
+def append_history(path: str, run: Dict):
+    """Append a run to the JSONL history file."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+
+def load_run(path: str) -> Dict:
+    """Load a baseline: a run saved as JSON, or the last run of a JSONL history."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(text.splitlines()[-1])
+
+def save_run(path: str, run: Dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+        f.write("\n")
+
+def compare(run: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """Compare a run with a baseline; returns one row per benchmark and metric found in both.
+
+    A row's ``regression`` is True when the metric got worse by more than ``tolerance``.
+    """
+    before = {result["name"]: result for result in baseline["results"]}
+    rows = []
+    for result in run["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            if result.get(metric) is None or not old.get(metric):
+                continue
+            change = result[metric] / old[metric] - 1
+            worse = -change if higher_is_better else change
+            rows.append({"name": result["name"], "metric": metric, "baseline": old[metric],
+                         "current": result[metric], "change": change, "regression": worse > tolerance})
+    return rows
+
+def format_results(results: List[Dict]) -> str:
+    lines = [f"{'benchmark':<40} {'iters':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10} {'peak KB':>10}"]
+    for r in results:
+        lines.append(f"{r['name']:<40} {r['iterations']:>6} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+                     f"{r['p99_ms']:>10.3f} {r['throughput']:>10.1f} "
+                     + (f"{r['peak_kb']:>10.1f}" if r["peak_kb"] is not None else f"{'-':>10}"))
+    return "\n".join(lines)
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'benchmark':<40} {'metric':<11} {'baseline':>11} {'current':>11} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<40} {row['metric']:<11} {row['baseline']:>11.3f} {row['current']:>11.3f} "
+                     f"{row['change']:>+8.1%}{flag}")
+    return "\n".join(lines)
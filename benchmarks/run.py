@@ -0,0 +1,94 @@
+# benchmarks/run.py
+"""Run the benchmarks, record them in the history and compare them with a baseline.
+
+    python -m benchmarks.run                                  # every benchmark
+    python -m benchmarks.run --only offers --sizes 100,10000  # a subset
+    python -m benchmarks.run --save-baseline                  # store this run as the baseline
+    python -m benchmarks.run --compare                        # exit 1 on a regression against it
+
+Each run is appended to the JSONL history with its commit, Python version and
+machine. Timings depend on the machine, so keep one baseline per machine.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from benchmarks import cases
+from benchmarks.harness import (DEFAULT_TOLERANCE, append_history, compare, format_comparison, format_results,
+                                load_run, measure, new_run, save_run)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(BENCHMARKS_DIR, "history.jsonl")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+def collect(sizes, llm_latency):
+    return [
+        *cases.offer_benchmarks(sizes),
+        *cases.pdf_benchmarks(),
+        *cases.weather_benchmarks(),
+        *cases.end_to_end_benchmarks(llm_latency),
+        *cases.startup_benchmarks(),
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation pipeline.")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Run benchmarks whose name contains this text (repeatable)")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in cases.SIZES),
+                        help="Comma-separated synthetic inventory sizes (rows per table)")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Multiplies each benchmark's minimum timed duration")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Seconds of fake LLM latency in the end-to-end benchmarks")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSONL file runs are appended to")
+    parser.add_argument("--no-history", action="store_true", help="Don't record this run")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help="Store this run as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help="Compare with a baseline (a saved run or a history file's last run)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    for name in ("langchain_integration", "agentic.workflow"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    sizes = [int(float(size)) for size in args.sizes.split(",") if size.strip()]
+    benchmarks = [benchmark for benchmark in collect(sizes, args.llm_latency)
+                  if not args.only or any(text in benchmark.name for text in args.only)]
+    if not benchmarks:
+        parser.error("no benchmark matches --only")
+
+    results = []
+    for benchmark in benchmarks:
+        result = measure(benchmark, args.time_scale)
+        results.append(result)
+        print(format_results([result]).splitlines()[-1] if len(results) > 1 else format_results([result]),
+              flush=True)
+
+    run = new_run(results)
+    if not args.no_history:
+        append_history(args.history, run)
+    if args.save_baseline:
+        save_run(args.save_baseline, run)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"No baseline at {args.compare}; run with --save-baseline first", file=sys.stderr)
+            return 2
+        rows = compare(run, load_run(args.compare), args.tolerance)
+        print()
+        print(format_comparison(rows))
+        regressions = sorted({row["name"] for row in rows if row["regression"]})
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: "
+                  f"{', '.join(regressions)}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# fake_llm.py
+"""A local stand-in for the Gemini chat model, for load tests and offline benchmarks.
+
+Plans are generated deterministically from the prompt, while latency, token
+rate and failures follow configurable distributions drawn from a seeded RNG.
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from agentic.dates import parse_date_range
+
+CHUNK_TOKENS = 8  # Tokens per streamed chunk
+MAX_PLAN_DAYS = 14
+
+_TRIP = re.compile(r"trip to (.+?) \((.+?)\) with a total budget of \$(\d[\d,]*(?:\.\d+)?)")
+_TOKEN = re.compile(r"\S+\s*")
+
+class ServiceUnavailable(Exception):
+    """Injected failure; named like the Google API error so it is treated as transient."""
+
+_SIGHTS = ["the old town", "the main museum", "a local market", "the riverside", "a hilltop viewpoint",
+           "the cathedral", "a historic quarter", "the botanical garden", "a food hall", "the harbour"]
+_MEALS = ["a family-run bistro", "a street food stall", "a wine bar", "a rooftop restaurant", "a local tavern"]
+
+def fake_plan(prompt: str) -> str:
+    """Build a markdown plan shaped like the real one; the same prompt always gives the same plan."""
+    match = _TRIP.search(prompt)
+    destination, dates, budget = match.groups() if match else ("your destination", "your dates", "0")
+    budget = budget.replace(",", "")
+    date_range = parse_date_range(dates)
+    days = min(date_range.days if date_range else 3, MAX_PLAN_DAYS)
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+    lines = [
+        "# DESTINATION OVERVIEW",
+        f"- {destination} is a wonderful choice for {dates}.",
+        "- Pack layers: mornings can be cool and afternoons warm.",
+        "- Learn a few local greetings; politeness goes a long way.",
+        "- Cards are widely accepted, but carry some cash for markets.",
+        "",
+        "# DAILY ITINERARY",
+    ]
+    for day in range(1, days + 1):
+        lines += [
+            f"## Day {day}",
+            f"- **Morning:** Visit {rng.choice(_SIGHTS)}.",
+            f"- **Afternoon:** Explore {rng.choice(_SIGHTS)} and stop for coffee.",
+            f"- **Evening:** Dinner at {rng.choice(_MEALS)}.",
+        ]
+    lines += [
+        "",
+        "# PRACTICAL INFORMATION",
+        "## Transportation",
+        f"- Public transit is the easiest way around {destination}; a day pass saves money.",
+        "## Accommodation",
+        "- Stay central to keep travel times short.",
+        "## Budget Breakdown",
+        f"- About ${float(budget) / max(days, 1):,.0f} per day for food, activities and transport.",
+        "## Must-See Attractions",
+        *(f"{i}. {sight.capitalize()}" for i, sight in enumerate(rng.sample(_SIGHTS, 5), start=1)),
+        "## Culinary Experiences",
+        f"- Try the local specialties at {rng.choice(_MEALS)}.",
+    ]
+    return "\n".join(lines)
+
+class FakeTravelLLM(BaseChatModel):
+    """Chat model that writes fake plans with realistic timing.
+
+    Each call waits a first-token latency drawn from a log-normal distribution
+    (``latency`` is its median, ``latency_sigma`` its shape), then produces the
+    plan at ``tokens_per_second`` (0 for instantly). ``failure_rate`` is the
+    chance a call raises ``ServiceUnavailable`` after its latency.
+
+    Like Gemini, the output stops at ``generation_config["max_output_tokens"]``
+    and messages carry ``usage_metadata``; a token is a whitespace-separated word.
+    """
+    latency: float = 0.5
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 200.0
+    failure_rate: float = 0.0
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any):
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeTravelLLM":
+        return cls(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", 0.5)),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", 0.5)),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKEN_RATE", 200)),
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", 0)),
+            seed=int(os.getenv("FAKE_LLM_SEED", 0)),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-travel"
+
+    def _start(self):
+        """Sample this call's latency and outcome, wait, and fail if the call was chosen to."""
+        with self._rng_lock:
+            latency = self.latency * self._rng.lognormvariate(0, self.latency_sigma) if self.latency else 0.0
+            fails = self._rng.random() < self.failure_rate
+        time.sleep(latency)
+        if fails:
+            raise ServiceUnavailable("injected failure from the fake LLM")
+
+    def _chunks(self, messages: List[BaseMessage], generation_config: Optional[dict] = None) -> Iterator[list]:
+        """Yield the plan's tokens in chunks, paced at the token rate and cut at the output limit."""
+        tokens = _TOKEN.findall(fake_plan(self._prompt(messages)))
+        limit = (generation_config or {}).get("max_output_tokens")
+        if limit:
+            tokens = tokens[:limit]
+        for i in range(0, len(tokens), CHUNK_TOKENS):
+            chunk = tokens[i:i + CHUNK_TOKENS]
+            if self.tokens_per_second:
+                time.sleep(len(chunk) / self.tokens_per_second)
+            yield chunk
+
+    @staticmethod
+    def _prompt(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    @staticmethod
+    def _usage(input_tokens: int, output_tokens: int) -> dict:
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._start()
+        tokens = [token for chunk in self._chunks(messages, kwargs.get("generation_config")) for token in chunk]
+        usage = self._usage(len(_TOKEN.findall(self._prompt(messages))), len(tokens))
+        message = AIMessage(content="".join(tokens), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._start()
+        # Usage is reported per chunk, the prompt's tokens with the first one
+        input_tokens = len(_TOKEN.findall(self._prompt(messages)))
+        for tokens in self._chunks(messages, kwargs.get("generation_config")):
+            text = "".join(tokens)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=text, usage_metadata=self._usage(input_tokens, len(tokens))))
+            input_tokens = 0
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
@@ -1,10 +1,19 @@
 # langchain_integration.py
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
+from collections import OrderedDict
+import hashlib
+import json
 import os
+import sqlite3
+import threading
+import time
 from dotenv import load_dotenv
 import logging
+from agentic.dates import parse_date_range
+from agentic.interface import normalize_dates, normalize_destination
+from agentic import metrics
+from prompt_builder import PROMPT_VERSION, build_plan_prompt, estimate_tokens
+from resilience import CircuitBreaker, CircuitOpen, Guard, Metrics, RateLimited, TokenBucket
+from semantic_cache import SemanticPlanCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,108 +22,559 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def get_llm():
-    """Initialize and return the LLM with proper error handling."""
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # Name of a registered backend, see LLM_BACKENDS
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT") or None  # "grpc" (library default) or "rest"
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))  # Seconds before a single Gemini request is abandoned
+
+# Resilience settings for LLM calls, shared by every session in the process
+LLM_RATE = float(os.getenv("LLM_RATE", 1.0))  # Average calls per second
+LLM_BURST = float(os.getenv("LLM_BURST", 5))  # Calls allowed back to back before the rate applies
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # Calls in flight at once
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 10))  # Seconds to wait for a call slot before falling back
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", 2))  # Retries of transient errors
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", 5))  # Consecutive failures that open the breaker
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", 30))  # Seconds before a trial call after opening
+LLM_SLOW_CALL = float(os.getenv("LLM_SLOW_CALL", 0)) or None  # Calls slower than this count as failures
+
+# Process-wide client registry. The module stays imported across Streamlit
+# reruns and sessions, so one client (and its pooled, keep-alive connection) is reused
+# by every plan instead of being rebuilt per call.
+_llm = None
+_registry_lock = threading.RLock()
+
+def _gemini_backend():
+    """Create the Gemini client, or return None without an API key."""
+    # The Gemini SDK takes most of a second to import, so it is loaded with the first client
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    # Check if API key is available
+    if not os.getenv("GOOGLE_API_KEY"):
+        logger.warning("GOOGLE_API_KEY not found in environment variables")
+        # Fallback message if API key is missing
+        return None
+
+    # Initialize the LLM
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash",
+        temperature=0.7,  # max_output_tokens is set per plan, see prompt_builder.output_budget
+        top_p=0.95,
+        top_k=40,
+        transport=LLM_TRANSPORT,
+        timeout=LLM_TIMEOUT,
+        max_retries=1,  # A single attempt; retries happen in llm_guard
+    )
+
+def _fake_backend():
+    """Create the local fake model (configured by the FAKE_LLM_* variables)."""
+    from fake_llm import FakeTravelLLM
+    return FakeTravelLLM.from_env()
+
+# LLM backends by name; each factory returns a LangChain chat model or None
+LLM_BACKENDS = {
+    "gemini": _gemini_backend,
+    "fake": _fake_backend,
+}
+
+def register_backend(name, factory):
+    """Make an LLM backend selectable through LLM_BACKEND or set_llm_backend()."""
+    LLM_BACKENDS[name] = factory
+
+def set_llm_backend(name):
+    """Switch the process to another registered backend; the client is recreated on next use."""
+    global LLM_BACKEND
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend {name!r}; choose from {', '.join(sorted(LLM_BACKENDS))}")
+    with _registry_lock:
+        LLM_BACKEND = name
+        reset_llm()
+
+def _create_llm():
+    """Initialize and return the LLM of the configured backend, with proper error handling."""
+    factory = LLM_BACKENDS.get(LLM_BACKEND)
+    if factory is None:
+        logger.error(f"Unknown LLM backend {LLM_BACKEND!r}; choose from {', '.join(sorted(LLM_BACKENDS))}")
+        return None
     try:
-        # Check if API key is available
-        if not os.getenv("GOOGLE_API_KEY"):
-            logger.warning("GOOGLE_API_KEY not found in environment variables")
-            # Fallback message if API key is missing
-            return None
-
-        # Initialize the LLM
-        return ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.7,
-            max_output_tokens=2048,
-            top_p=0.95,
-            top_k=40
-        )
+        return factory()
     except Exception as e:
         logger.error(f"Error initializing LLM: {str(e)}")
         return None
 
-# Define a more detailed LangChain template for generating travel recommendations
-template = """
-You are an expert travel consultant with extensive knowledge of global destinations.
-Create a personalized travel plan for a trip to {destination} during {dates} with a budget of ${budget}.
-
-Please provide a comprehensive and well-structured itinerary including:
-
-# DESTINATION OVERVIEW
-- Brief introduction to {destination}
-- Current weather and seasonal considerations for {dates}
-- Local customs, etiquette, and language tips
-- Currency and payment information
-
-# DAILY ITINERARY
-Create a day-by-day plan covering the entire duration of the trip ({dates}), including:
-- Morning activities
-- Afternoon explorations
-- Evening entertainment
-- Recommended dining options for each day
-
-# PRACTICAL INFORMATION
-## Transportation
-- Best ways to get around {destination}
-- Public transit options and approximate costs
-- Recommended transportation apps
-
-## Accommodation
-- Neighborhoods that best match the traveler's budget
-- Estimated nightly rates
-- Special amenities to look for
-
-## Budget Breakdown
-- Approximate daily costs for food, activities, and transportation
-- Suggested allocation of the ${budget} budget
-- Money-saving tips specific to {destination}
-
-## Must-See Attractions
-- Top 5 attractions with estimated visit duration and costs
-- Lesser-known local gems
-- Recommended booking methods to avoid lines
-
-## Culinary Experiences
-- Local specialties and where to find them
-- Price ranges for different dining options
-- Food markets and culinary tours worth exploring
-
-Format the itinerary in a clear, organized manner with appropriate headings and bullet points.
-Make specific recommendations rather than generic advice.
-"""
-
-prompt = PromptTemplate(
-    input_variables=["destination", "dates", "budget"],
-    template=template,
-)
-
-def generate_travel_plan(destination, dates, budget):
-    """Generate a travel plan using LangChain with error handling."""
+def get_llm():
+    """Return the shared LLM client, creating it on first use."""
+    global _llm
+    if _llm is None:
+        with _registry_lock:
+            if _llm is None:
+                _llm = _create_llm()
+    return _llm
+
+def reset_llm():
+    """Drop the shared client, e.g. after rotating the API key."""
+    global _llm
+    with _registry_lock:
+        _llm = None
+
+def warm_up():
+    """Create the shared client ahead of the first request. Returns True if the LLM is ready."""
+    return get_llm() is not None
+
+PLAN_DETAIL = os.getenv("PLAN_DETAIL", "standard")  # Default plan detail: brief, standard or detailed
+
+# Plan cache configuration
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", 6 * 60 * 60))  # Seconds a cached plan stays valid
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", 256))  # Max plans kept in memory
+PLAN_CACHE_DISK_SIZE = int(os.getenv("PLAN_CACHE_DISK_SIZE", 10000))  # Max plans kept on disk
+PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH")  # Optional SQLite file for the on-disk tier
+
+def format_selections(itinerary) -> str:
+    """Describe an optimized itinerary's bookings for the prompt ("" when there is none)."""
+    if itinerary is None:
+        return ""
+    lines = []
+    if itinerary.flight:
+        flight = itinerary.flight
+        lines.append(f"- Flight: {flight.airline} {flight.departure}-{flight.arrival}, "
+                     f"${flight.price:,.0f}/person each way")
+    if itinerary.hotel:
+        hotel = itinerary.hotel
+        lines.append(f"- Stay: {hotel.name} ({hotel.type}, {hotel.rating}/10), "
+                     f"${hotel.price:,.0f}/night x {itinerary.nights} nights")
+    if itinerary.activities:
+        lines.append("- Activities: " + "; ".join(
+            f"{activity.name} ({activity.duration}, ${activity.price:,.0f}/person)"
+            for activity in itinerary.activities))
+    lines.append(f"- Total for {itinerary.travelers} traveler(s): ${itinerary.cost:,.0f}")
+    return "\n".join(lines)
+
+def plan_cache_key(destination, dates, budget, selections="", detail=PLAN_DETAIL) -> str:
+    """Build a content-addressed cache key from the normalized request and prompt version.
+
+    The budget is exact, since a plan quotes it; near-identical budgets are left to the semantic tier,
+    which rewrites the amounts.
+    """
+    payload = json.dumps({
+        "destination": normalize_destination(destination),
+        "dates": normalize_dates(dates),
+        "budget": f"{float(budget):.2f}",
+        "selections": hashlib.sha256(selections.encode("utf-8")).hexdigest()[:16] if selections else "",
+        "detail": detail,
+        "template": PROMPT_VERSION,
+        "backend": LLM_BACKEND,  # Plans from a fake or test backend never stand in for real ones
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class MemoryCache:
+    """In-process LRU cache tier with per-entry expiry."""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_SIZE, ttl: float = PLAN_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteCache:
+    """On-disk cache tier backed by SQLite, shared between processes using the same file."""
+
+    def __init__(self, path: str, max_entries: int = PLAN_CACHE_DISK_SIZE, ttl: float = PLAN_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS plans_accessed ON plans (accessed)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM plans WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires < now:
+                self._conn.execute("DELETE FROM plans WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE plans SET accessed = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            # Evict expired entries first, then the least recently used beyond the size bound
+            self._conn.execute("DELETE FROM plans WHERE expires < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM plans WHERE key IN ("
+                "SELECT key FROM plans ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM plans")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+class PlanCache:
+    """Tiered plan cache: memory first, then the optional disk tier, with hit/miss counters."""
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                # Promote to the faster tiers
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": [len(tier) for tier in self.tiers],
+        }
+
+def build_plan_cache(path=PLAN_CACHE_PATH, ttl=PLAN_CACHE_TTL):
+    """Create the default plan cache: an LRU tier plus an SQLite tier when a path is configured."""
+    tiers = [MemoryCache(ttl=ttl)]
+    if path:
+        try:
+            tiers.append(SQLiteCache(path, ttl=ttl))
+        except sqlite3.Error as e:
+            logger.error(f"Error opening plan cache at {path}: {str(e)}")
+    return PlanCache(tiers)
+
+plan_cache = build_plan_cache()
+
+# Fallback plans shown when the LLM is not configured or fails; never cached
+PLAN_UNAVAILABLE = "Unable to generate travel plan at this time. Please try again later."
+PLAN_FAILED = ("Sorry, we encountered an issue while creating your travel plan. "
+               "Please try again with different parameters or contact support if the problem persists.")
+
+# Similarity tier: near-identical requests (same destination and trip length, dates a
+# day or two apart, similar budget and bookings) reuse a prior plan
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 1024))  # Plans indexed; 0 disables the tier
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.9))  # Similarity needed to reuse a plan
+SEMANTIC_FALLBACK_THRESHOLD = float(os.getenv("SEMANTIC_FALLBACK_THRESHOLD", 0.6))  # Looser match when the LLM is unavailable
+
+semantic_cache = SemanticPlanCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, PLAN_CACHE_TTL) \
+    if SEMANTIC_CACHE_SIZE > 0 else None
+
+def set_semantic_cache(cache):
+    """Replace the process-wide similarity cache (None disables it)."""
+    global semantic_cache
+    semantic_cache = cache
+
+def set_plan_cache(cache):
+    """Replace the process-wide plan cache (any object with get/set, or None to disable caching)."""
+    global plan_cache
+    plan_cache = cache
+
+def build_llm_guard():
+    """Create the guard (rate limit, concurrency cap, retries, circuit breaker) for LLM calls."""
+    guard_metrics = Metrics()
+    return Guard(
+        limiter=TokenBucket(LLM_RATE, LLM_BURST),
+        breaker=CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET, metrics=guard_metrics),
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        queue_timeout=LLM_QUEUE_TIMEOUT,
+        retries=LLM_RETRIES,
+        slow_call=LLM_SLOW_CALL,
+        metrics=guard_metrics,
+    )
+
+llm_guard = build_llm_guard()
+
+def set_llm_guard(guard):
+    """Replace the process-wide LLM guard, e.g. with different limits in tests."""
+    global llm_guard
+    llm_guard = guard
+
+# First line of templated plans, served when the LLM cannot be called
+PLAN_FALLBACK_NOTE = ("> Our AI travel planner is very busy right now, so here is a quick outline of your trip. "
+                      "Please try again in a few minutes for a fully personalized plan.")
+FALLBACK_PLAN_DAYS = 14  # Longest day-by-day outline in a templated plan
+
+def templated_plan(destination, dates, budget, selections=""):
+    """Build a basic plan outline without the LLM."""
+    date_range = parse_date_range(dates)
+    days = date_range.days if date_range else 3
+    lines = [
+        PLAN_FALLBACK_NOTE,
+        "",
+        "# DESTINATION OVERVIEW",
+        f"- Trip to {destination} during {dates} with a budget of ${budget}",
+    ]
+    bookings = [line for line in selections.splitlines() if line.startswith("- ")]
+    if bookings:
+        lines += ["", "## Your Bookings", *bookings]
+    lines += ["", "# DAILY ITINERARY"]
+    for day in range(1, min(days, FALLBACK_PLAN_DAYS) + 1):
+        lines += [
+            f"## Day {day}",
+            "- Morning: explore a landmark or neighborhood",
+            "- Afternoon: one of your planned activities",
+            "- Evening: dinner at a local restaurant",
+        ]
+    lines += [
+        "",
+        "# PRACTICAL INFORMATION",
+        "## Budget Breakdown",
+        f"- About ${float(budget) / days:,.0f} per day over {days} day{'s' if days != 1 else ''}",
+    ]
+    return "\n".join(lines)
+
+def fallback_plan(destination, dates, budget, selections="", detail=PLAN_DETAIL):
+    """Return a plan without calling the LLM; it is approximate unless this exact request was cached.
+
+    In order: the cached plan for the same request, the adapted plan of a similar
+    trip (with a looser threshold than usual), else a templated outline.
+    """
+    cache = plan_cache
+    if cache is not None:
+        cached = cache.get(plan_cache_key(destination, dates, budget, selections, detail))
+        if cached is not None:
+            return cached
+    if semantic_cache is not None:
+        similar = semantic_cache.get(destination, dates, budget, selections, backend=LLM_BACKEND,
+                                     threshold=SEMANTIC_FALLBACK_THRESHOLD)
+        if similar is not None:
+            return similar
+    return templated_plan(destination, dates, budget, selections)
+
+def _cached_plan(key, destination, dates, budget, selections, approximate):
+    """Look a plan up in the exact cache, then (if ``approximate``) among similar requests."""
+    cache = plan_cache
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    if approximate and semantic_cache is not None:
+        return semantic_cache.get(destination, dates, budget, selections, backend=LLM_BACKEND)
+    return None
+
+def _remember_plan(key, destination, dates, budget, selections, plan):
+    cache = plan_cache
+    if cache is not None:
+        cache.set(key, plan)
+    if semantic_cache is not None:
+        semantic_cache.add(destination, dates, budget, selections, plan, backend=LLM_BACKEND)
+
+usage_metrics = Metrics()  # Plans generated and their input/output tokens
+
+def _record_usage(destination, plan_prompt, output, usage, elapsed, first_token=None):
+    """Count a plan's tokens, as reported by the model or else estimated from the text, and time the call.
+
+    ``first_token`` is the seconds until the first streamed chunk; without it the
+    whole response is taken to arrive at once.
+    """
+    estimated = not usage
+    input_tokens = usage.get("input_tokens", 0) if usage else plan_prompt.input_tokens
+    output_tokens = usage.get("output_tokens", 0) if usage else estimate_tokens(output)
+    usage_metrics.incr("plans")
+    usage_metrics.incr("input_tokens", input_tokens)
+    usage_metrics.incr("output_tokens", output_tokens)
+    if estimated:
+        usage_metrics.incr("estimated")
+    logger.info(f"Plan for {destination}: {input_tokens} input and {output_tokens} output tokens"
+                f"{' (estimated)' if estimated else ''}, limit {plan_prompt.max_output_tokens}, in {elapsed:.2f}s")
+
+    metrics.record("llm", elapsed)
+    first_token = elapsed if first_token is None else first_token
+    metrics.LLM_FIRST_TOKEN_SECONDS.observe(first_token, LLM_BACKEND)
+    generating = elapsed - first_token or elapsed  # A non-streamed response is rated over the whole call
+    if output_tokens and generating > 0:
+        metrics.LLM_TOKENS_PER_SECOND.observe(output_tokens / generating, LLM_BACKEND)
+
+def usage_stats():
+    """Return the token counters of generated plans, with per-plan averages."""
+    stats = usage_metrics.snapshot()
+    plans = stats.get("plans", 0)
+    for name in ("input_tokens", "output_tokens"):
+        stats[f"avg_{name}"] = stats.get(name, 0) / plans if plans else 0.0
+    return stats
+
+def _generation_config(plan_prompt):
+    return {"generation_config": {"max_output_tokens": plan_prompt.max_output_tokens}}
+
+def generate_travel_plan(destination, dates, budget, selections="", approximate=True, detail=PLAN_DETAIL):
+    """Generate a travel plan using LangChain with error handling.
+
+    ``selections`` optionally describes offers the plan should build on (see format_selections).
+    ``detail`` is one of prompt_builder.DETAIL_LEVELS. With ``approximate``, a plan generated
+    for a near-identical request may be adapted and served instead of calling the LLM.
+    """
+    key = plan_cache_key(destination, dates, budget, selections, detail)
+    cached = _cached_plan(key, destination, dates, budget, selections, approximate)
+    if cached is not None:
+        return cached
+
     try:
-        # Get LLM instance
+        # Get the shared client
         llm = get_llm()
 
         # If LLM initialization failed, return a fallback message
         if llm is None:
-            return "Unable to generate travel plan at this time. Please try again later."
+            return PLAN_UNAVAILABLE
 
-        # Create the chain
-        travel_chain = LLMChain(
-            llm=llm,
-            prompt=prompt,
-            verbose=False,  # Set to True for debugging
-        )
+        # Size the prompt and output limit to the trip, then call the model through the
+        # shared rate limiter, retries and circuit breaker
+        plan_prompt = build_plan_prompt(destination, dates, budget, selections, detail)
+        started = time.perf_counter()
+        response = llm_guard.call(llm.invoke, plan_prompt.text, **_generation_config(plan_prompt))
+        result = response.content if isinstance(response.content, str) else ""
+        _record_usage(destination, plan_prompt, result, getattr(response, "usage_metadata", None),
+                      time.perf_counter() - started)
 
-        # Run the chain
-        result = travel_chain.run(
-            destination=destination,
-            dates=dates,
-            budget=budget
-        )
+        if result:
+            _remember_plan(key, destination, dates, budget, selections, result)
 
         return result
 
+    except (CircuitOpen, RateLimited) as e:
+        logger.warning(f"Serving a fallback travel plan: {str(e)}")
+        llm_guard.metrics.incr("fallbacks")
+        return fallback_plan(destination, dates, budget, selections, detail)
     except Exception as e:
         logger.error(f"Error generating travel plan: {str(e)}")
-        return f"Sorry, we encountered an issue while creating your travel plan. Please try again with different parameters or contact support if the problem persists."
+        llm_guard.metrics.incr("fallbacks")
+        return fallback_plan(destination, dates, budget, selections, detail)
+
+def _stream_text(llm, text, usage, **kwargs):
+    """Yield the text of each chunk, adding up the token usage the chunks report into ``usage``."""
+    for chunk in llm.stream(text, **kwargs):
+        for name, count in (getattr(chunk, "usage_metadata", None) or {}).items():
+            if isinstance(count, int):
+                usage[name] = usage.get(name, 0) + count
+        if isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
+
+def stream_travel_plan(destination, dates, budget, selections="", approximate=True, detail=PLAN_DETAIL):
+    """Stream a travel plan as text chunks while the LLM generates it.
+
+    Yields the cached plan (or, with ``approximate``, an adapted plan of a
+    near-identical request) in a single chunk on a cache hit. The full plan is
+    cached once the stream completes. When the LLM is rate limited, failing or
+    behind an open circuit breaker, a fallback plan is yielded instead.
+    """
+    key = plan_cache_key(destination, dates, budget, selections, detail)
+    cached = _cached_plan(key, destination, dates, budget, selections, approximate)
+    if cached is not None:
+        yield cached
+        return
+
+    llm = get_llm()
+    if llm is None:
+        yield PLAN_UNAVAILABLE
+        return
+
+    chunks = []
+    usage = {}
+    plan_prompt = build_plan_prompt(destination, dates, budget, selections, detail)
+    started = time.perf_counter()
+    first_token = None
+    try:
+        for chunk in llm_guard.stream(_stream_text, llm, plan_prompt.text, usage, **_generation_config(plan_prompt)):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            chunks.append(chunk)
+            yield chunk
+    except (CircuitOpen, RateLimited) as e:
+        logger.warning(f"Serving a fallback travel plan: {str(e)}")
+        llm_guard.metrics.incr("fallbacks")
+        yield fallback_plan(destination, dates, budget, selections, detail)
+        return
+    except Exception as e:
+        logger.error(f"Error streaming travel plan: {str(e)}")
+        if chunks:
+            yield "\n\n" + PLAN_FAILED
+        else:
+            llm_guard.metrics.incr("fallbacks")
+            yield fallback_plan(destination, dates, budget, selections, detail)
+        return
+
+    result = "".join(chunks)
+    _record_usage(destination, plan_prompt, result, usage, time.perf_counter() - started, first_token)
+    if result:
+        _remember_plan(key, destination, dates, budget, selections, result)
+
+def _collect_metrics():
+    """Export the LLM guard's events, token usage and plan cache counters with the metrics."""
+    guard = llm_guard.stats()
+    breaker_state = guard.pop("breaker_state")
+    usage = usage_metrics.snapshot()
+    caches = {}
+    for name, cache in (("plan", plan_cache), ("semantic", semantic_cache)):
+        if cache is not None and hasattr(cache, "stats"):
+            stats = cache.stats()
+            caches[name] = (stats["hits"], stats["misses"])
+    return [
+        ("travel_llm_events_total", "counter",
+         "LLM guard events: calls, successes, failures, retries, rate_limited, short_circuited, fallbacks.",
+         "event", guard),
+        ("travel_llm_breaker_open", "gauge", "1 while the LLM circuit breaker is open or half-open.", "",
+         {"": int(breaker_state != "closed")}),
+        ("travel_llm_tokens_total", "counter", "Tokens sent to and generated by the LLM.", "kind",
+         {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0)}),
+        ("travel_plans_total", "counter", "Plans generated by the LLM.", "", {"": usage.get("plans", 0)}),
+        *metrics.cache_families(caches),
+    ]
+
+metrics.register_collector(_collect_metrics)
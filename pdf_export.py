@@ -0,0 +1,449 @@
+# pdf_export.py
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+import contextvars
+import datetime
+import functools
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+
+from agentic.metrics import CACHE_HITS, CACHE_MISSES, timed
+
+logger = logging.getLogger(__name__)
+
+LOGO_PATH = 'smart-travel.png'  # Update with the actual path to your logo
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", 32))  # Rendered PDFs kept in memory
+
+# Table styles are immutable command lists, so they are built once and shared by every document
+TRIP_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightsteelblue),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
+    ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+])
+
+OFFER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+])
+
+@functools.lru_cache(maxsize=1)
+def get_styles():
+    """Build the paragraph styles once per process."""
+    styles = getSampleStyleSheet()
+
+    return {
+        'title': ParagraphStyle(
+            name='CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            alignment=TA_CENTER,
+            spaceAfter=24
+        ),
+        'heading1': ParagraphStyle(
+            name='Heading1',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceBefore=16,
+            spaceAfter=10,
+            textColor=colors.darkblue
+        ),
+        'heading2': ParagraphStyle(
+            name='Heading2',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceBefore=12,
+            spaceAfter=8,
+            textColor=colors.navy
+        ),
+        'heading3': ParagraphStyle(
+            name='Heading3',
+            parent=styles['Heading3'],
+            fontSize=12,
+            spaceBefore=10,
+            spaceAfter=6,
+            textColor=colors.darkblue
+        ),
+        'normal': ParagraphStyle(
+            name='CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceBefore=4,
+            spaceAfter=4,
+            alignment=TA_JUSTIFY
+        ),
+        'bullet': ParagraphStyle(
+            name='CustomBullet',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceBefore=2,
+            spaceAfter=2,
+            leftIndent=20,
+            bulletIndent=10
+        ),
+        'italic': ParagraphStyle(
+            name='CustomItalic',
+            parent=styles['Italic'],
+            fontSize=10,
+            alignment=TA_CENTER
+        ),
+        'footer': ParagraphStyle(
+            name='Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.darkblue,
+            alignment=TA_CENTER
+        ),
+        'logo': ParagraphStyle(
+            name='LogoText',
+            parent=styles['Title'],
+            fontSize=20,
+            alignment=TA_CENTER,
+            textColor=colors.darkblue
+        ),
+        'datetime': ParagraphStyle(
+            name='DateTime',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.darkblue,
+            alignment=TA_RIGHT
+        ),
+    }
+
+@functools.lru_cache(maxsize=1)
+def _logo_bytes():
+    """Read the logo once per process; None if there is no logo file."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    with open(LOGO_PATH, 'rb') as f:
+        return f.read()
+
+def _draw_footer(canvas, doc):
+    """Draw the page footer with contact details and the page number."""
+    width = letter[0]
+
+    # Save state
+    canvas.saveState()
+
+    # Add a horizontal line above footer
+    canvas.setStrokeColor(colors.lightgrey)
+    canvas.setLineWidth(0.5)
+    canvas.line(72, 60, width - 72, 60)
+
+    # Add footer text
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.darkblue)
+
+    # Company name and copyright
+    canvas.drawCentredString(width/2, 45, "Smart Travel - Your Journey, Our Expertise")
+    canvas.drawCentredString(width/2, 30, "Email: office@smart-travel.com | Phone: +39 3121144778")
+
+    # Add page number
+    page_num = canvas.getPageNumber()
+    canvas.drawRightString(width - 72, 30, f"Page {page_num}")
+
+    # Restore state
+    canvas.restoreState()
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_BULLET = re.compile(r'^(\s*)[*+-]\s+(.*)$')
+_NUMBERED = re.compile(r'^(\s*)(\d+)[.)]\s+(.*)$')
+_RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_BOLD = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__')
+_ITALIC = re.compile(r'(?<![*\w])\*(?=\S)(.+?)(?<=\S)\*(?![*\w])|(?<![_\w])_(?=\S)(.+?)(?<=\S)_(?!\w)')
+
+def inline_markup(text: str) -> str:
+    """Convert markdown bold and italic to ReportLab paragraph markup, escaping everything else."""
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    text = _BOLD.sub(lambda m: f"<b>{m.group(1) or m.group(2)}</b>", text)
+    return _ITALIC.sub(lambda m: f"<i>{m.group(1) or m.group(2)}</i>", text)
+
+@functools.lru_cache(maxsize=8)
+def _list_style(depth: int):
+    """Bullet style indented for a nesting depth."""
+    bullet_style = get_styles()['bullet']
+    if depth == 0:
+        return bullet_style
+    return ParagraphStyle(
+        name=f'CustomBullet{depth}',
+        parent=bullet_style,
+        leftIndent=bullet_style.leftIndent + 15 * depth,
+        bulletIndent=bullet_style.bulletIndent + 15 * depth
+    )
+
+class MarkdownFlowables:
+    """Single-pass converter from markdown to flowables that can be fed incrementally.
+
+    Text is consumed line by line as it arrives, so the plan can be fed chunk by
+    chunk while the LLM is still streaming. Supports ``#``-``######`` headings,
+    ``*``/``-``/``+`` bullets (nested by indentation), numbered lists, horizontal
+    rules, and bold/italic inline markup. Consecutive text lines form one paragraph.
+    """
+
+    def __init__(self, styles=None):
+        self.styles = styles or get_styles()
+        self.flowables = []
+        self._pending = ''
+        self._paragraph = []
+
+    def feed(self, chunk: str) -> "MarkdownFlowables":
+        self._pending += chunk
+        if '\n' in self._pending:
+            *lines, self._pending = self._pending.split('\n')
+            for line in lines:
+                self._line(line)
+        return self
+
+    def close(self) -> list:
+        """Flush any buffered text and return the flowables."""
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ''
+        self._flush_paragraph()
+        return self.flowables
+
+    def _flush_paragraph(self):
+        if self._paragraph:
+            text = ' '.join(self._paragraph)
+            self._paragraph = []
+            self.flowables.append(Paragraph(inline_markup(text), self.styles['normal']))
+
+    def _line(self, line: str):
+        if not line.strip():
+            self._flush_paragraph()
+            return
+
+        match = _HEADING.match(line)
+        if match:
+            self._flush_paragraph()
+            level = min(len(match.group(1)), 3)
+            self.flowables.append(Paragraph(inline_markup(match.group(2)), self.styles[f'heading{level}']))
+            return
+
+        if _RULE.match(line):
+            self._flush_paragraph()
+            self.flowables.append(Spacer(1, 0.1*inch))
+            return
+
+        match = _BULLET.match(line)
+        if match:
+            self._flush_paragraph()
+            depth = len(match.group(1).expandtabs(4)) // 2
+            self.flowables.append(Paragraph(inline_markup(match.group(2)), _list_style(min(depth, 4)), bulletText='•'))
+            return
+
+        match = _NUMBERED.match(line)
+        if match:
+            self._flush_paragraph()
+            depth = len(match.group(1).expandtabs(4)) // 2
+            self.flowables.append(Paragraph(inline_markup(match.group(3)), _list_style(min(depth, 4)),
+                                            bulletText=f"{match.group(2)}."))
+            return
+
+        self._paragraph.append(line.strip())
+
+def markdown_to_flowables(content: str) -> list:
+    """Convert a complete markdown travel plan into flowables."""
+    return MarkdownFlowables().feed(content).close()
+
+def _offer_table(rows, col_widths):
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(OFFER_TABLE_STYLE)
+    return table
+
+@timed("pdf")
+def render_pdf(content, destination, dates, budget, hotels, flights, activities, plan_flowables=None,
+               costs=None) -> bytes:
+    """Render the travel itinerary PDF and return its bytes.
+
+    ``plan_flowables`` may hold the plan already converted by ``MarkdownFlowables``;
+    otherwise ``content`` is converted here. ``costs`` (a ``CostBreakdown``) adds the
+    estimated trip cost to the summary table.
+    """
+    styles = get_styles()
+    heading1_style = styles['heading1']
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                           rightMargin=72, leftMargin=72,
+                           topMargin=72, bottomMargin=72)
+
+    # Build document
+    elements = []
+
+    # Logo and header
+    # Check if logo exists, if not, create a text-based header
+    logo = _logo_bytes()
+    if logo:
+        # Add logo with proper sizing
+        elements.append(Image(io.BytesIO(logo), width=2*inch, height=0.75*inch))
+    else:
+        # Text-based logo as fallback
+        elements.append(Paragraph("<b>SMART TRAVEL</b>", styles['logo']))
+
+    elements.append(Spacer(1, 0.25*inch))
+
+    # Title
+    elements.append(Paragraph(f"Travel Itinerary", styles['title']))
+    elements.append(Spacer(1, 0.25*inch))
+
+    # Add current date and time
+    current_datetime = datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
+    elements.append(Paragraph(f"Generated on: {current_datetime}", styles['datetime']))
+    elements.append(Spacer(1, 0.1*inch))
+
+    # Trip summary table with better styling
+    trip_info = [
+        ['Destination:', destination],
+        ['Travel Dates:', dates],
+        ['Budget:', f"${budget}"]
+    ]
+    if costs is not None:
+        trip_info += [
+            ['Travelers:', str(costs.travelers)],
+            ['Nights:', str(costs.nights)],
+            ['Estimated Cost:', f"${costs.total:,.0f} (${costs.per_person:,.0f} per person, "
+                                f"${costs.per_night:,.0f} per night)"],
+        ]
+
+    trip_table = Table(trip_info, colWidths=[1.5*inch, 4*inch])
+    trip_table.setStyle(TRIP_TABLE_STYLE)
+    elements.append(trip_table)
+    elements.append(Spacer(1, 0.5*inch))
+
+    # Travel plan sections, parsed from the markdown unless already converted while streaming
+    elements.extend(plan_flowables if plan_flowables is not None else markdown_to_flowables(content))
+
+    # Add a page break before recommendations
+    elements.append(PageBreak())
+
+    # Flight information with improved styling
+    elements.append(Paragraph("Flight Options", heading1_style))
+    elements.append(Spacer(1, 0.1*inch))
+
+    flight_data = [['Airline', 'Price', 'Departure', 'Arrival']]
+    for flight in flights[:3]:  # Show the 3 best-ranked flights
+        flight_data.append([
+            flight.airline,
+            f"${flight.price}",
+            flight.departure,
+            flight.arrival
+        ])
+
+    elements.append(_offer_table(flight_data, [1.25*inch, 1*inch, 1.5*inch, 1.5*inch]))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Hotel information with improved styling
+    elements.append(Paragraph("Accommodation Options", heading1_style))
+    elements.append(Spacer(1, 0.1*inch))
+
+    hotel_data = [['Hotel', 'Price per Night', 'Rating']]
+    for hotel in hotels[:3]:  # Show the 3 best-ranked hotels
+        hotel_data.append([
+            hotel.name,
+            f"${hotel.price}",
+            f"{hotel.rating}⭐"
+        ])
+
+    elements.append(_offer_table(hotel_data, [2.5*inch, 1.5*inch, 1*inch]))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Activities with improved styling
+    elements.append(Paragraph("Recommended Activities", heading1_style))
+    elements.append(Spacer(1, 0.1*inch))
+
+    activity_data = [['Activity', 'Price', 'Duration']]
+    for activity in activities[:5]:  # Show the 5 best-ranked activities
+        activity_data.append([
+            activity.name,
+            f"${activity.price}",
+            activity.duration
+        ])
+
+    elements.append(_offer_table(activity_data, [3*inch, 1*inch, 1*inch]))
+    elements.append(Spacer(1, 0.5*inch))
+
+    # Enhanced footer with contact information
+    elements.append(Paragraph("Thank you for using our Smart Travel Planner!", styles['italic']))
+    elements.append(Spacer(1, 0.1*inch))
+
+    # Contact information in footer
+    elements.append(Paragraph(
+        f"Contact us: <b>Email:</b> office@smart-travel.com | <b>Phone:</b> +39 3121144778",
+        styles['footer']
+    ))
+
+    # Build PDF with custom footer
+    doc.build(elements, onFirstPage=_draw_footer, onLaterPages=_draw_footer)
+    return buffer.getvalue()
+
+def pdf_cache_key(content, destination, dates, budget, hotels, flights, activities, costs=None) -> str:
+    """Hash everything that appears in the PDF, so identical plans share one rendering."""
+    payload = json.dumps([
+        content, destination, dates, str(budget), list(costs) if costs is not None else None,
+        [list(flight) for flight in flights[:3]],
+        [list(hotel) for hotel in hotels[:3]],
+        [list(activity) for activity in activities[:5]],
+    ], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+def get_pdf(content, destination, dates, budget, hotels, flights, activities, plan_flowables=None,
+            costs=None) -> bytes:
+    """Return the itinerary PDF, rendering it only if this plan has not been rendered before."""
+    key = pdf_cache_key(content, destination, dates, budget, hotels, flights, activities, costs)
+    with _pdf_cache_lock:
+        pdf = _pdf_cache.get(key)
+        if pdf is not None:
+            _pdf_cache.move_to_end(key)
+            CACHE_HITS.incr("pdf")
+            return pdf
+    CACHE_MISSES.incr("pdf")
+
+    pdf = render_pdf(content, destination, dates, budget, hotels, flights, activities, plan_flowables, costs)
+
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf
+        while len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+    return pdf
+
+# A single background worker keeps ReportLab builds off the request path without
+# running several layouts at once
+_pdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-render")
+
+def submit_pdf(content, destination, dates, budget, hotels, flights, activities, plan_flowables=None,
+               costs=None) -> Future:
+    """Start rendering the itinerary PDF in the background; the future resolves to its bytes."""
+    # In a copy of the caller's context, so the render is timed in the caller's trace
+    return _pdf_executor.submit(contextvars.copy_context().run, get_pdf, content, destination, dates, budget,
+                                hotels, flights, activities, plan_flowables, costs)
+
+def create_pdf(content, destination, dates, budget, hotels, flights, activities, costs=None):
+    """Return the itinerary PDF as a file-like buffer."""
+    return io.BytesIO(get_pdf(content, destination, dates, budget, hotels, flights, activities, costs=costs))
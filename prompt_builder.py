@@ -0,0 +1,93 @@
+# prompt_builder.py
+"""Build the travel plan prompt from sections chosen by trip length and detail level."""
+import hashlib
+import math
+from typing import NamedTuple, Tuple
+
+from agentic.dates import parse_date_range
+
+DETAIL_LEVELS = ("brief", "standard", "detailed")
+DEFAULT_DAYS = 3  # Assumed trip length when the dates cannot be parsed
+LONG_TRIP_DAYS = 7  # From this length, each day is kept to a few bullets
+
+# Output tokens: a fixed part for the non-daily sections plus a share per day, by detail level
+OUTPUT_BASE_TOKENS = {"brief": 250, "standard": 550, "detailed": 800}
+OUTPUT_DAY_TOKENS = {"brief": 60, "standard": 110, "detailed": 170}
+MIN_OUTPUT_TOKENS = 512
+MAX_OUTPUT_TOKENS = 8192
+
+CHARS_PER_TOKEN = 4  # Rough average for English prose
+
+HEADER = ("You are an expert travel consultant. Write a personalized travel plan in markdown for a "
+          "{days}-day trip to {destination} ({dates}) with a total budget of ${budget}.")
+BOOKINGS = "Build the plan around these bookings and do not suggest alternatives to them:\n{selections}"
+FOOTER = "Use headings and bullet points. Make specific recommendations and skip generic advice."
+
+# (name, lowest detail level that includes it, instruction), in output order
+SECTIONS = (
+    ("overview", "brief", "# DESTINATION OVERVIEW: a short intro, weather for the dates, customs and "
+                          "language tips, currency and payments."),
+    ("daily", "brief", "# DAILY ITINERARY: a '## Day N' heading for every day with morning, afternoon and "
+                       "evening plans and a dining pick."),
+    ("transportation", "standard", "## Transportation: getting around, transit options and costs, useful apps."),
+    ("accommodation", "standard", "## Accommodation: neighborhoods that fit the budget, nightly rates, "
+                                  "amenities to look for."),
+    ("budget", "brief", "## Budget Breakdown: daily costs for food, activities and transport, how to split "
+                        "the ${budget}, money-saving tips."),
+    ("attractions", "standard", "## Must-See Attractions: top 5 with visit time and cost, lesser-known gems, "
+                                "how to avoid lines."),
+    ("culinary", "detailed", "## Culinary Experiences: local specialties and where to find them, price "
+                             "ranges, food markets and tours."),
+)
+LONG_TRIP_DAILY = " Keep each day to three short bullets."
+BOOKED_ACCOMMODATION = "## Accommodation: what is worth knowing about the area around the booked stay."
+
+# Identifies the prompt wording, so cached plans are not reused after it changes
+PROMPT_VERSION = hashlib.sha256(
+    "\n".join([HEADER, BOOKINGS, FOOTER, LONG_TRIP_DAILY, BOOKED_ACCOMMODATION,
+               *(text for _, _, text in SECTIONS)]).encode("utf-8")
+).hexdigest()[:16]
+
+class PlanPrompt(NamedTuple):
+    text: str
+    max_output_tokens: int
+    input_tokens: int  # Estimated
+    sections: Tuple[str, ...]
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text without calling the model's tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def output_budget(days: int, detail: str = "standard") -> int:
+    """Return the output token limit for a plan of ``days`` days at a detail level."""
+    tokens = OUTPUT_BASE_TOKENS[detail] + OUTPUT_DAY_TOKENS[detail] * days
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, tokens))
+
+def build_plan_prompt(destination, dates, budget, selections="", detail="standard") -> PlanPrompt:
+    """Build the prompt for a plan, with the sections and output budget for its length and detail.
+
+    ``selections`` (see ``langchain_integration.format_selections``) lists offers already
+    chosen for the trip, so the model plans around them instead of inventing its own.
+    """
+    detail = detail if detail in DETAIL_LEVELS else "standard"
+    rank = DETAIL_LEVELS.index(detail)
+    date_range = parse_date_range(dates)
+    days = date_range.days if date_range else DEFAULT_DAYS
+
+    parts = [HEADER.format(days=days, destination=destination, dates=dates, budget=budget)]
+    if selections.strip():
+        parts.append(BOOKINGS.format(selections=selections.strip()))
+    included = []
+    for name, level, text in SECTIONS:
+        if DETAIL_LEVELS.index(level) > rank:
+            continue
+        if name == "daily" and days >= LONG_TRIP_DAYS:
+            text += LONG_TRIP_DAILY
+        elif name == "accommodation" and selections.strip():
+            text = BOOKED_ACCOMMODATION
+        parts.append(text.replace("{budget}", str(budget)))
+        included.append(name)
+    parts.append(FOOTER)
+
+    text = "\n".join(parts)
+    return PlanPrompt(text, output_budget(days, detail), estimate_tokens(text), tuple(included))
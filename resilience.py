@@ -0,0 +1,252 @@
+# resilience.py
+"""Rate limiting, retries and a circuit breaker for calls to external services."""
+from collections import Counter
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Exception class names treated as transient (rate limits, overload, timeouts), so
+# Google API errors are recognised without importing the client libraries here
+TRANSIENT_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "Aborted",
+}
+
+class RateLimited(Exception):
+    """No call slot became free within the queue timeout."""
+
+class CircuitOpen(Exception):
+    """The circuit breaker is open, so the call was not attempted."""
+
+def is_transient(error: BaseException) -> bool:
+    """Return True for errors worth retrying: timeouts, dropped connections and overload."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+class Metrics:
+    """Thread-safe event counters."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+class TokenBucket:
+    """Token bucket allowing ``rate`` calls per second on average, in bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        """Take a token if one is available (returns 0), else return the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Wait for a token for up to ``timeout`` seconds (forever if None). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._wait_time()
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """Stops calling a failing service for a while, then lets a single trial call through.
+
+    The breaker opens after ``failure_threshold`` consecutive failures. After
+    ``reset_timeout`` seconds it is half-open: one call is allowed and its
+    outcome closes the breaker again or reopens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, metrics: Metrics = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics or Metrics()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(f"Circuit breaker {self._state} -> {state}")
+            self.metrics.incr(f"breaker_{state}")
+            self._state = state
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+                self._trial = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def cancel(self):
+        """Give back a trial call that was allowed but never made."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+class Guard:
+    """Runs calls to one service through a rate limiter, a concurrency cap, retries and a breaker.
+
+    Transient errors are retried with full-jitter exponential backoff, each
+    attempt going through the limiter and breaker again. Calls slower than
+    ``slow_call`` seconds still return but count as failures for the breaker,
+    so a degraded service trips it too.
+    """
+
+    def __init__(self, limiter: TokenBucket = None, breaker: CircuitBreaker = None, max_concurrency: int = 8,
+                 queue_timeout: float = 10.0, retries: int = 2, base_delay: float = 0.5, max_delay: float = 8.0,
+                 slow_call: float = None, metrics: Metrics = None):
+        self.metrics = metrics or Metrics()
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker(metrics=self.metrics)
+        self.queue_timeout = queue_timeout
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.slow_call = slow_call
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _admit(self):
+        """Check the breaker, then wait for a rate token and a concurrency slot."""
+        self.metrics.incr("calls")
+        if not self.breaker.allow():
+            self.metrics.incr("short_circuited")
+            raise CircuitOpen("circuit breaker is open")
+        deadline = time.monotonic() + self.queue_timeout
+        if self.limiter is not None and not self.limiter.acquire(self.queue_timeout):
+            reason = f"no rate limit token within {self.queue_timeout}s"
+        elif not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            reason = f"no free call slot within {self.queue_timeout}s"
+        else:
+            return
+        self.breaker.cancel()
+        self.metrics.incr("rate_limited")
+        raise RateLimited(reason)
+
+    def _finish(self, started: float, error: BaseException = None):
+        self._slots.release()
+        if error is not None:
+            self.metrics.incr("failures")
+            self.breaker.record_failure()
+        elif self.slow_call is not None and time.monotonic() - started > self.slow_call:
+            self.metrics.incr("slow_calls")
+            self.breaker.record_failure()
+        else:
+            self.metrics.incr("successes")
+            self.breaker.record_success()
+
+    def _retry(self, attempt: int, error: BaseException) -> bool:
+        if attempt >= self.retries or not is_transient(error):
+            return False
+        self.metrics.incr("retries")
+        delay = self.backoff(attempt)
+        logger.warning(f"Transient error ({type(error).__name__}: {error}), retrying in {delay:.2f}s")
+        time.sleep(delay)
+        return True
+
+    def call(self, func, *args, **kwargs):
+        """Call ``func`` through the guard; raises CircuitOpen, RateLimited or the last error."""
+        attempt = 0
+        while True:
+            self._admit()
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._finish(started, e)
+                if self._retry(attempt, e):
+                    attempt += 1
+                    continue
+                raise
+            self._finish(started)
+            return result
+
+    def stream(self, func, *args, **kwargs):
+        """Iterate ``func(*args, **kwargs)`` through the guard.
+
+        Failures are retried only until the first item is produced; after that
+        the error is raised to the consumer.
+        """
+        attempt = 0
+        while True:
+            self._admit()
+            started = time.monotonic()
+            produced = False
+            try:
+                for item in func(*args, **kwargs):
+                    produced = True
+                    yield item
+            except GeneratorExit:
+                self._finish(started)
+                raise
+            except Exception as e:
+                self._finish(started, e)
+                if not produced and self._retry(attempt, e):
+                    attempt += 1
+                    continue
+                raise
+            self._finish(started)
+            return
+
+    def stats(self) -> dict:
+        return {**self.metrics.snapshot(), "breaker_state": self.breaker.state}
@@ -0,0 +1,193 @@
+# semantic_cache.py
+"""Serve plans for near-identical requests without calling the LLM again.
+
+Requests are embedded into unit vectors made of weighted blocks, one per
+feature, so the cosine similarity of two requests is the weighted average of
+the per-feature similarities:
+
+- start date: Gaussian bumps around the day of year (cyclic), so trips a
+  day or two apart are close and trips weeks apart are not
+- budget: Gaussian bumps over log(budget), so similarity depends on the ratio
+- selections: hashed word unigrams and bigrams of the booked offers
+
+Only requests for the same destination, trip length, backend and booked flight
+and stay are compared, by brute force over a NumPy matrix per such group. The
+activities and total may differ, as they do between nearby budgets.
+"""
+from collections import OrderedDict
+import hashlib
+import math
+import re
+import threading
+import time
+
+import numpy as np
+
+from agentic.dates import parse_date_range
+from agentic.interface import normalize_dates, normalize_destination
+
+# Feature weights; they sum to 1, so a request's similarity is their weighted average
+WEIGHTS = {"date": 0.45, "budget": 0.30, "selections": 0.25}
+
+DATE_WIDTH = 2.0  # Days; starts a day apart score ~0.94, three days ~0.57, a week ~0
+BUDGET_WIDTH = 0.1  # In log(budget); budgets 5% apart score ~0.94, 10% ~0.8, 30% ~0.18
+HASH_DIMS = 256
+
+_DAY_ANCHORS = np.arange(0, 366, DATE_WIDTH)
+_BUDGET_ANCHORS = np.arange(math.log(50), math.log(1e6), BUDGET_WIDTH)
+_WORD = re.compile(r"[a-z0-9]+")
+BOOKING_LINES = ("- Flight:", "- Stay:")  # Selection lines a shared plan must match exactly
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _bumps(value: float, anchors: np.ndarray, width: float, period: float = None) -> np.ndarray:
+    distance = np.abs(anchors - value)
+    if period is not None:
+        distance = np.minimum(distance, period - distance)
+    return _unit(np.exp(-0.5 * (distance / width) ** 2))
+
+def _hashed(text: str, ngram: int = 2) -> np.ndarray:
+    vector = np.zeros(HASH_DIMS)
+    words = _WORD.findall(text.lower())
+    if not words:
+        vector[0] = 1.0  # Requests without selections all match each other
+        return vector
+    for n in range(1, ngram + 1):
+        for i in range(len(words) - n + 1):
+            digest = hashlib.blake2b(" ".join(words[i:i + n]).encode("utf-8"), digest_size=4).digest()
+            vector[1 + int.from_bytes(digest, "little") % (HASH_DIMS - 1)] += 1.0
+    return _unit(vector)
+
+def embed_request(dates: str, budget: float, selections: str = ""):
+    """Return ``(trip_days, vector)`` for a request; trip_days is None if the dates don't parse."""
+    date_range = parse_date_range(dates)
+    if date_range is not None:
+        date_block = _bumps(date_range.start.timetuple().tm_yday, _DAY_ANCHORS, DATE_WIDTH, period=366)
+        days = date_range.days
+    else:
+        # Unparsed dates only match the same text
+        date_block = _hashed(normalize_dates(dates), ngram=1)
+        days = None
+    budget_block = _bumps(math.log(max(float(budget), 1.0)), _BUDGET_ANCHORS, BUDGET_WIDTH)
+    blocks = [
+        math.sqrt(WEIGHTS["date"]) * date_block,
+        math.sqrt(WEIGHTS["budget"]) * budget_block,
+        math.sqrt(WEIGHTS["selections"]) * _hashed(selections),
+    ]
+    return days, np.concatenate(blocks).astype(np.float32)
+
+def _money_pattern(budget) -> re.Pattern:
+    """Match the budget written as a dollar amount, but not as the start of a longer amount."""
+    amount = float(budget)
+    forms = {f"{amount:,.0f}", f"{amount:.0f}", f"{amount:,.2f}", str(budget)}
+    # Longest forms first, so "$3,000.00" is replaced whole; a digit, or a separator followed by
+    # a digit, means a longer amount ("$3000", "$3,500"), while a full stop can end a sentence
+    alternatives = "|".join(re.escape(form) for form in sorted(forms, key=len, reverse=True))
+    return re.compile(rf"\$(?:{alternatives})(?![\d]|[,.]\d)")
+
+def adapt_plan(plan: str, old: dict, dates: str, budget, destination: str) -> str:
+    """Rewrite the dates, budget and destination spelling of a prior plan for a new request."""
+    if old["dates"] != dates:
+        plan = plan.replace(old["dates"], dates)
+    if float(old["budget"]) != float(budget):
+        new_budget = f"${float(budget):,.0f}"
+        plan = _money_pattern(old["budget"]).sub(lambda _: new_budget, plan)
+    if old["destination"] != destination:
+        plan = plan.replace(old["destination"], destination)
+    return plan
+
+class SemanticPlanCache:
+    """In-memory similarity index of generated plans; see the module docstring."""
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.9, ttl: float = 6 * 60 * 60):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # id -> (group, request fields, plan, expires, vector)
+        self._groups = {}  # (backend, destination, days, flight and stay) -> [ids, matrix or None]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _group(backend, destination, days, selections):
+        # A plan is built around its flight and stay, so only requests booking the same ones compare
+        bookings = "\n".join(" ".join(line.split()) for line in selections.splitlines()
+                             if line.strip().startswith(BOOKING_LINES))
+        return backend, normalize_destination(destination), days, bookings
+
+    def add(self, destination, dates, budget, selections, plan, backend=""):
+        days, vector = embed_request(dates, budget, selections)
+        group = self._group(backend, destination, days, selections)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            request = {"destination": destination, "dates": dates, "budget": budget}
+            self._entries[entry_id] = (group, request, plan, time.time() + self.ttl, vector)
+            ids = self._groups.setdefault(group, [[], None])
+            ids[0].append(entry_id)
+            ids[1] = None  # Rebuilt on the next lookup
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, entry_id):
+        group = self._entries.pop(entry_id)[0]
+        ids = self._groups[group]
+        ids[0].remove(entry_id)
+        ids[1] = None
+        if not ids[0]:
+            del self._groups[group]
+
+    def match(self, destination, dates, budget, selections="", backend="", threshold=None):
+        """Return ``(similarity, request, plan)`` of the most similar cached plan above the threshold, or None."""
+        threshold = self.threshold if threshold is None else threshold
+        days, vector = embed_request(dates, budget, selections)
+        group = self._group(backend, destination, days, selections)
+        now = time.time()
+        with self._lock:
+            ids = self._groups.get(group)
+            if ids is not None:
+                for entry_id in [i for i in ids[0] if self._entries[i][3] < now]:
+                    self._drop(entry_id)
+                ids = self._groups.get(group)
+            if ids is None:
+                self.misses += 1
+                return None
+            if ids[1] is None:
+                ids[1] = np.stack([self._entries[i][4] for i in ids[0]])
+            similarities = ids[1] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            _, request, plan, _, _ = self._entries[ids[0][best]]
+            return float(similarities[best]), request, plan
+
+    def get(self, destination, dates, budget, selections="", backend="", threshold=None):
+        """Return a prior plan adapted to this request if a similar enough one is cached, else None."""
+        found = self.match(destination, dates, budget, selections, backend, threshold)
+        if found is None:
+            return None
+        _, request, plan = found
+        return adapt_plan(plan, request, dates, budget, destination)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }